@@ -1,9 +1,10 @@
 import streamlit as st
 import os
-import requests
 from dotenv import load_dotenv
 from streamlit_option_menu import option_menu
 from streamlit_lottie import st_lottie
+from utils import bootstrap
+from utils.lottie import load_lotties
 
 load_dotenv()
 
@@ -14,18 +15,17 @@ st.set_page_config(
     page_icon="🏥"
 )
 
+# Provider connections and the reminder scheduler, once per process, whichever page is opened first
+bootstrap.start()
 
-def load_lottieurl(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
 
-
-lottie_health_bot = load_lottieurl("https://assets5.lottiefiles.com/packages/lf20_qmfs6c3i.json")
-lottie_reminder = load_lottieurl("https://assets10.lottiefiles.com/packages/lf20_xh83pj1c.json")
-lottie_find_doctor = load_lottieurl("https://lottie.host/80b5b580-97c7-48f5-a0e6-565dfb86498a/y2ZzX3B4bB.json")
-lottie_call_support = load_lottieurl("https://assets4.lottiefiles.com/private_files/lf30_jcikwtux.json")
+# Cached and fetched concurrently; falls back to a bundled animation if the CDN is slow or down
+lottie_health_bot, lottie_reminder, lottie_find_doctor, lottie_call_support = load_lotties([
+    "https://assets5.lottiefiles.com/packages/lf20_qmfs6c3i.json",
+    "https://assets10.lottiefiles.com/packages/lf20_xh83pj1c.json",
+    "https://lottie.host/80b5b580-97c7-48f5-a0e6-565dfb86498a/y2ZzX3B4bB.json",
+    "https://assets4.lottiefiles.com/private_files/lf30_jcikwtux.json",
+])
 
 
 translations = {
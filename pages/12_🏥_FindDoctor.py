@@ -1,8 +1,16 @@
-import requests
-import json
 import streamlit as st
-import math
-import os
+import re
+from utils import bootstrap
+from utils.cities import get_city_index
+from utils.place_cards import PAGE_SIZE, render_cards
+from utils.places import (DEFAULT_RADIUS_M, PREFETCH_TYPES, PlacesError, PrefetchBudget,
+                          get_places_client, split_service_types)
+
+# Browser geolocation is optional; without it users can still type their coordinates
+try:
+    from streamlit_js_eval import get_geolocation
+except ImportError:
+    get_geolocation = None
 
 # --- Page Config ---
 st.set_page_config(
@@ -11,6 +19,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded",
 )
+bootstrap.start()
 
 st.logo("logo_transparent.png", icon_image="only_doctor.png")
 
@@ -61,6 +70,14 @@ st.markdown("""
         border-left: 5px solid #3498db;
         cursor: pointer;
     }
+    .service-grid {
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(260px, 1fr));
+        gap: 15px;
+    }
+    .service-grid a {
+        text-decoration: none;
+    }
     .service-card:hover {
         transform: translateY(-5px);
         box-shadow: 10px 16px 18px rgba(0, 0, 0, 0.15);
@@ -83,6 +100,12 @@ st.markdown("""
         -webkit-line-clamp: 4;
         -webkit-box-orient: vertical;
     }
+    .service-distance {
+        margin-top: 8px;
+        font-size: 13px;
+        font-weight: bold;
+        color: #3498db;
+    }
     .slider-label {
         font-size: 30px;
         font-weight: bold;
@@ -111,144 +134,152 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# State code mapping
-state_code_mapping = {
-    "AP": "Andhra Pradesh",
-    "AR": "Arunachal Pradesh",
-    "AS": "Assam",
-    "BR": "Bihar",
-    "CT": "Chhattisgarh",
-    "GA": "Goa",
-    "GJ": "Gujarat",
-    "HR": "Haryana",
-    "HP": "Himachal Pradesh",
-    "JK": "Jammu and Kashmir",
-    "JH": "Jharkhand",
-    "KA": "Karnataka",
-    "KL": "Kerala",
-    "MP": "Madhya Pradesh",
-    "MH": "Maharashtra",
-    "MN": "Manipur",
-    "ML": "Meghalaya",
-    "MZ": "Mizoram",
-    "NL": "Nagaland",
-    "OR": "Odisha",
-    "PB": "Punjab",
-    "RJ": "Rajasthan",
-    "SK": "Sikkim",
-    "TN": "Tamil Nadu",
-    "TG": "Telangana",
-    "TR": "Tripura",
-    "UP": "Uttar Pradesh",
-    "UT": "Uttarakhand",
-    "WB": "West Bengal",
-    "AN": "Andaman and Nicobar Islands",
-    "CH": "Chandigarh",
-    "DH": "Dadra and Nagar Haveli and Daman and Diu",
-    "DL": "Delhi",
-    "LD": "Lakshadweep",
-    "PY": "Puducherry",
-    "LA": "Ladakh"
-}
-
-# Load city data
-with open('pages/cities.json', 'r') as f:
-    city_data = json.load(f)
-
-# Create a set of unique states
-states = sorted({state_code_mapping.get(city['stateCode'], city['stateCode']) for city in city_data})
+# Parsed once per process (see utils/cities.py)
+city_index = get_city_index()
 
 # Streamlit UI
 st.sidebar.write("---")
 st.sidebar.markdown('<div class="title">Healthcare Services Finder</div>', unsafe_allow_html=True)
 
+# Parse "lat, long" typed by the user
+def parse_coordinates(text):
+    numbers = re.findall(r"-?\d+(?:\.\d+)?", text)
+    if len(numbers) != 2:
+        return None
+    lat, lon = float(numbers[0]), float(numbers[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+search_mode = st.radio("Search around", ["A city", "My location"], horizontal=True)
+
+city_query = ""
+if search_mode == "A city":
+    # Type-ahead city search across all states
+    city_query = st.text_input("🔎 Type a city name", placeholder="e.g. Mathura",
+                               help="Or pick a state and city below")
+
 # Create three columns for the search interface
 col1, col2, col3 = st.columns(3)
 
-# State selection
-with col1:
-    selected_state = st.selectbox("Select State", ["Select a state"] + states, index=0, key="state_select")
+city_id = None
+user_position = None
+if search_mode == "My location":
+    with col1:
+        if get_geolocation is not None and st.checkbox("📍 Use my browser location"):
+            location = get_geolocation()
+            if location and "coords" in location:
+                user_position = (location["coords"]["latitude"], location["coords"]["longitude"])
+            else:
+                st.info("Waiting for the browser to share your location...")
+        else:
+            coordinates = st.text_input("Your latitude, longitude", placeholder="27.4924, 77.6737")
+            if coordinates:
+                user_position = parse_coordinates(coordinates)
+                if user_position is None:
+                    st.warning("Enter coordinates as: latitude, longitude")
+    with col2:
+        if user_position:
+            (city_id, distance_m), = city_index.nearest(*user_position)
+            st.text_input("Nearest city", city_index.label(city_id), disabled=True)
+            st.caption(f"{distance_m / 1000:.1f} km from you")
+        else:
+            st.selectbox("Nearest city", ["Waiting for your location"], disabled=True, key="nearest_city")
+elif city_query:
+    matches = city_index.search(city_query)
+    with col1:
+        city_id = st.selectbox("Matching cities", matches, format_func=city_index.label,
+                               key="city_match_select") if matches else None
+        if not matches:
+            st.warning("No city starts with that name.")
+    with col2:
+        st.selectbox("Select City", ["Type-ahead search in use"], disabled=True, key="city_select_disabled")
+else:
+    # State selection
+    with col1:
+        selected_state = st.selectbox("Select State", ["Select a state"] + city_index.states, index=0, key="state_select")
 
-# City selection
-with col2:
-    if selected_state and selected_state != "Select a state":
-        selected_state_code = next((code for code, name in state_code_mapping.items() if name == selected_state), None)
-        filtered_cities = [city['name'] for city in city_data if city['stateCode'] == selected_state_code]
-        selected_city = st.selectbox("Select City", ["Select a city"] + filtered_cities, index=0, key="city_select")
-    else:
-        selected_city = st.selectbox("Select City", ["Select a city"], disabled=True, key="city_select_disabled")
+    # City selection
+    with col2:
+        if selected_state and selected_state != "Select a state":
+            city_id = st.selectbox("Select City", [None] + city_index.cities_in(selected_state), index=0,
+                                   format_func=lambda i: "Select a city" if i is None else city_index.names[i],
+                                   key="city_select")
+        else:
+            st.selectbox("Select City", ["Select a city"], disabled=True, key="city_select_disabled")
+
+selected_city = city_index.names[city_id] if city_id is not None else None
+
+# Warm the search cache for the usual service types while the user is still typing one
+if selected_city:
+    if "prefetch_budget" not in st.session_state:
+        st.session_state.prefetch_budget = PrefetchBudget()
+    prefetch_lat, prefetch_lon = user_position or city_index.coordinates(city_id)
+    get_places_client().prefetch(prefetch_lat, prefetch_lon, PREFETCH_TYPES, DEFAULT_RADIUS_M,
+                                 st.session_state.prefetch_budget)
 
 # Healthcare service type input
 with col3:
     service_type = st.text_input("Enter Healthcare Service Type", 
                                 placeholder="Dentist, Hospital or Health ",
-                                help="Enter the type of healthcare service you're looking for")
+                                help="Enter the type of healthcare service you're looking for. "
+                                     "Separate several types with commas to search them together")
 
-if selected_city and selected_city != "Select a city" and service_type:
-    city_info = next((city for city in city_data if city['name'] == selected_city), None)
+query_id = None
+if selected_city and service_type:
+    # Search around the user's actual position when we have it, else the city centre
+    latitude, longitude = user_position or city_index.coordinates(city_id)
 
-    if city_info:
-        latitude = city_info['latitude']
-        longitude = city_info['longitude']
+    st.markdown('<div class="slider-label">Select search radius (in meters)</div>', unsafe_allow_html=True)
+    radius_meters = st.slider('', 10000, 200000, DEFAULT_RADIUS_M)
+    radius_km = radius_meters / 1000
+    st.write(f"Searching within a radius of {radius_km:.2f} km")
+    types = "+".join(split_service_types(service_type))
+    query_id = f"{latitude:.5f},{longitude:.5f}|{types}|{radius_meters}|{selected_city}"
 
-        st.markdown('<div class="slider-label">Select search radius (in meters)</div>', unsafe_allow_html=True)
-        radius_meters = st.slider('', 10000, 200000, 60000)
-        radius_km = radius_meters / 1000
-        st.write(f"Searching within a radius of {radius_km:.2f} km")
-
-        if st.button('Search Healthcare Services', use_container_width=True):
-            api_key = os.getenv('OLA_API_KEY')
-            api_url = ""
-            
-            params = {
-                "layers": "{}",
-                "types": service_type,
-                "location": f"{latitude},{longitude}",
-                "radius": radius_meters,
-                "api_key": api_key,
-                "limit": 50
+    if st.button('Search Healthcare Services', use_container_width=True):
+        try:
+            # One concurrent, cached search per type, merged and sorted by distance (see utils/places.py)
+            predictions = get_places_client().search_many(latitude, longitude, service_type, radius_meters)
+            st.session_state.search_results = {
+                "id": query_id,
+                "predictions": predictions,
+                "city": selected_city,
+                "radius_km": radius_km,
             }
+            st.session_state.results_shown = PAGE_SIZE
+        except PlacesError as e:
+            st.error(f"Error: {e}")
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
 
-            try:
-                response = requests.get(api_url, params=params)
-                
-                if response.status_code == 200:
-                    data = response.json()
-
-                    if 'predictions' in data and data['predictions']:
-                        st.subheader(f"Healthcare services found within {radius_km:.2f} km:")
-                        st.markdown("---")
+# Results stay in session state so "Load more" reruns don't search again; they are only
+# shown while the inputs still describe the search that produced them
+results = st.session_state.get("search_results")
+if results and results["id"] == query_id:
+    predictions = results["predictions"]
+    if predictions:
+        st.subheader(f"Healthcare services found within {results['radius_km']:.2f} km:")
+        st.markdown("---")
 
-                        num_services = len(data['predictions'])
-                        num_rows = math.ceil(num_services / 3)
+        # The whole grid goes out as one element instead of one per card
+        shown = min(st.session_state.get("results_shown", PAGE_SIZE), len(predictions))
+        st.markdown(render_cards(results["id"], predictions, results["city"], shown), unsafe_allow_html=True)
 
-                        for row in range(num_rows):
-                            cols = st.columns(3)
-                            for col in range(3):
-                                service_index = row * 3 + col
-                                if service_index < num_services:
-                                    service = data['predictions'][service_index]
-                                    with cols[col]:
-                                        search_query = f"{service['structured_formatting']['main_text']} {selected_city}"
-                                        google_search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
-                                        st.markdown(f"""
-                                        <a href="{google_search_url}" target="_blank" style="text-decoration: none;">
-                                            <div class="service-card"> 
-                                                <div class="service-name">{service['structured_formatting']['main_text']}</div>
-                                                <div class="service-address">{service['structured_formatting']['secondary_text']}</div>
-                                            </div>
-                                        </a>
-                                        """, unsafe_allow_html=True)
-                        st.markdown("---")
-                    else:
-                        st.warning(f"No healthcare services found within {radius_km:.2f} km.")
-                else:
-                    st.error(f"Error: Unable to fetch data (Status Code: {response.status_code})")
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
+        if shown < len(predictions):
+            st.caption(f"Showing {shown} of {len(predictions)}")
+            if st.button("Load more", use_container_width=True):
+                st.session_state.results_shown = shown + PAGE_SIZE
+                st.rerun()
+        st.markdown("---")
+    else:
+        st.warning(f"No healthcare services found within {results['radius_km']:.2f} km.")
 
 # Sidebar footer
 with st.sidebar:
+    st.write("---")
+    cache_stats = get_places_client().cache.stats()
+    st.caption(f"Search cache: {cache_stats['hit_rate']:.0%} hit rate, {cache_stats['coalesced']} coalesced")
     st.write("---")
     st.success(print_praise())
     st.write("---")
@@ -5,10 +5,12 @@ import streamlit as st
 from dotenv import load_dotenv
 from streamlit_lottie import st_lottie
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
 from audio_recorder_streamlit import audio_recorder
-import base64
-import textwrap
+from utils import bootstrap, registry, tts
+from utils.lottie import load_lottie
+from utils.retrieval import get_retriever
+from utils.semantic_cache import get_answer_cache
+from utils.streaming import StreamMetrics, timed_stream
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +18,7 @@ load_dotenv()
 # Global variables
 model = None
 groq_api_key = os.getenv('GROQ_API_KEY')
+MODEL_NAME = "Llama-3.1-70b-versatile"
 
 # Prompt Template
 prompt_template = ChatPromptTemplate.from_template(
@@ -48,16 +51,10 @@ prompt_template = ChatPromptTemplate.from_template(
     """
 )
 
-# Function to load Lottie animations
-def load_lottieurl(url):
-    r = requests.get(url)
-    return r.json() if r.status_code == 200 else None
-
-# Function to load the Groq model
+# Function to load the Groq model (shared by all sessions, built once per process)
 def load_model():
     global model
-    model = ChatGroq(groq_api_key=groq_api_key,
-                     model_name="Llama-3.1-70b-versatile")
+    model = registry.get_chat_groq(MODEL_NAME)
 
 # Main function
 def main():
@@ -65,11 +62,16 @@ def main():
 
     # Set up Streamlit page
     st.set_page_config(page_title='ClickClinic', layout='wide', page_icon="🩺")
+    bootstrap.start()
     st.sidebar.title("ClickClinic : Your Health and Nutrition Companion")
     
     # Initialize session state variables if not exist
     if 'audio_response' not in st.session_state:
         st.session_state.audio_response = False
+    if 'stream_response' not in st.session_state:
+        st.session_state.stream_response = True
+    if 'turn_metrics' not in st.session_state:
+        st.session_state.turn_metrics = []
     if 'messages' not in st.session_state:
         st.session_state.messages = [{"role": "assistant", "content": "Namaste 🙏 How can I help you with your health query today?"}]
     
@@ -108,7 +110,7 @@ def setup_sidebar():
 
         # Lottie animation
         lottie_url = "https://assets9.lottiefiles.com/packages/lf20_jcikwtux.json"
-        st_lottie(load_lottieurl(lottie_url), height=200, key="sidebar_animation")
+        st_lottie(load_lottie(lottie_url), height=200, key="sidebar_animation")
 
         st.markdown("---")
 
@@ -135,6 +137,9 @@ def setup_sidebar():
         # Audio output toggle
         st.session_state.audio_response = st.toggle("Output Audio response", value=st.session_state.audio_response)
 
+        # Streaming toggle
+        st.session_state.stream_response = st.toggle("Stream response", value=st.session_state.stream_response)
+
         st.markdown("---")
 
         # API key input fields
@@ -188,32 +193,92 @@ def handle_user_input():
             st.write(user_question)
 
         with st.chat_message("assistant"):
-            with st.spinner("Processing your health query..."):
-                # Generate response
-                start = time.process_time()
-                response = model.invoke(prompt_template.format(
-                    context="Healthcare general knowledge", 
-                    input=user_question, 
-                    language=st.session_state.language
-                )).content
-                print("Response time:", time.process_time() - start)
-
-                # Force Hindi response if Hindi is selected
-                if st.session_state.language == "Hindi":
-                    st.session_state.selected_language_code = "hi-IN"
-                    response = f"निम्नलिखित उत्तर हिंदी में है:\n\n{response}"
-
-                st.write(response)
-                
-                # Optional audio response
-                if st.session_state.audio_response:
-                    try:
-                        sarvam(response, st.session_state.selected_language_code)
-                    except Exception as e:
-                        st.error(f"Audio generation failed: {e}")
-
-                # Append assistant's message
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            # Ground the answer in the local reference index (falls back to general knowledge)
+            retrieval_start = time.perf_counter()
+            context = get_retriever().context_for(user_question)
+            retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
+
+            prompt = prompt_template.format(
+                context=context, 
+                input=user_question, 
+                language=st.session_state.language
+            )
+
+            # Force Hindi response if Hindi is selected
+            prefix = ""
+            if st.session_state.language == "Hindi":
+                st.session_state.selected_language_code = "hi-IN"
+                prefix = "निम्नलिखित उत्तर हिंदी में है:\n\n"
+
+            # Generate response (or reuse the answer to a near-identical question), timing it on the wall clock
+            answer_cache = get_answer_cache()
+            metrics = StreamMetrics()
+            first_audio_at = None
+            spoken = False
+            cached = answer_cache.lookup(user_question, st.session_state.language)
+            if cached is not None:
+                response = "".join(timed_stream([cached], metrics))
+                st.write(prefix + response)
+            elif st.session_state.stream_response and st.session_state.audio_response:
+                # Voice pipeline: each sentence is sent to TTS as soon as the model finishes it
+                if prefix:
+                    st.write(prefix)
+                response, first_audio_at = stream_with_speech(
+                    timed_stream(model.stream(prompt), metrics), prefix, st.session_state.selected_language_code)
+                spoken = True
+            elif st.session_state.stream_response:
+                if prefix:
+                    st.write(prefix)
+                response = st.write_stream(timed_stream(model.stream(prompt), metrics))
+            else:
+                with st.spinner("Processing your health query..."):
+                    response = "".join(timed_stream([model.invoke(prompt)], metrics))
+                st.write(prefix + response)
+            if cached is None:
+                answer_cache.store(user_question, st.session_state.language, response)
+            response = prefix + response
+
+            st.session_state.turn_metrics.append({
+                **metrics.as_dict(), "cached": cached is not None, "retrieval_ms": retrieval_ms,
+                "first_audio_s": first_audio_at - metrics.started if first_audio_at else None,
+            })
+            print("Response time:", metrics.total_latency)
+
+            # Optional audio response (already spoken if it was streamed through the voice pipeline)
+            if st.session_state.audio_response and not spoken:
+                try:
+                    sarvam(response, st.session_state.selected_language_code)
+                except Exception as e:
+                    st.error(f"Audio generation failed: {e}")
+
+            # Append assistant's message
+            st.session_state.messages.append({"role": "assistant", "content": response})
+
+    show_metrics_panel()
+
+# Function to show per-turn latency numbers in the sidebar
+def show_metrics_panel():
+    with st.sidebar.expander("⏱️ Response metrics", expanded=False):
+        if not st.session_state.turn_metrics:
+            st.caption("No responses yet.")
+            return
+
+        def fmt(value, unit):
+            return "–" if value is None else f"{value:.2f}{unit}"
+
+        last = st.session_state.turn_metrics[-1]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("TTFT", fmt(last["ttft_s"], "s"))
+        col2.metric("Total", fmt(last["total_s"], "s"))
+        col3.metric("Tok/s", fmt(last["tokens_per_s"], ""))
+        st.dataframe(st.session_state.turn_metrics, use_container_width=True)
+
+        cache_stats = get_answer_cache().stats()
+        st.caption(f"Answer cache: {cache_stats['hit_rate']:.0%} hit rate "
+                   f"({cache_stats['hits']} hits / {cache_stats['misses']} misses, {cache_stats['entries']} entries)")
+        tts_stats = tts.cache_stats()
+        st.caption(f"Voice cache: {tts_stats['hit_rate']:.0%} of segments reused "
+                   f"({tts_stats['hits']} hits / {tts_stats['misses']} misses)")
 
 # Rest of the functions remain the same as in the previous version...
 
@@ -236,56 +301,46 @@ def speech2text():
 
 # Sarvam AI text to speech function
 def sarvam(text, language_code):
-    url = ""
-    headers = {'API-Subscription-Key': '', "Content-Type": "application/json"}
-    
-    delimiters = "|" if language_code == "hi-IN" else "."
-    segments = [segment.strip() for segment in text.split(delimiters) if segment.strip()]
-
-    progress_bar = st.progress(0)
-    total_steps = len(segments)
-    output_file = "output.wav"
-    
-    with open(output_file, "wb") as audio_file:
-        for i, segment in enumerate(segments):
-            if len(segment) > 500:
-                chunks = textwrap.wrap(segment, 500)
-            else:
-                chunks = [segment]
-
-            for chunk in chunks:
-                payload = {
-                    "inputs": [chunk],
-                    "target_language_code": language_code,
-                    "speaker": "{}",
-                    "pitch": 0,
-                    "pace": 1.00,
-                    "loudness": 1.15,
-                    "speech_sample_rate": 8000,
-                    "enable_preprocessing": True,
-                    "model": "bulbul:v1"
-                }
-
-                response = requests.post(url, json=payload, headers=headers)
-
-                if response.status_code == 200:
-                    try:
-                        audio_string = response.text[12:-3]
-                        audio_data = base64.b64decode(audio_string)
-                        audio_file.write(audio_data)
-                    except Exception as e:
-                        st.error(f"Error decoding audio: {e}")
-                        return
-                else:
-                    st.error(f"API request failed: {response.status_code}. Reason: {response.text}")
-                    return
-
-                time.sleep(0.5)
-
-            progress_bar.progress((i + 1) / total_steps)
-
-    # Display audio player without auto-play to prevent disruption
-    st.audio(output_file, format="audio/wav")
+    speech = tts.SpeechPipeline(language_code)
+    speech.feed(text)
+    speech.close()
+    play_speech(speech, st.empty())
+
+# Function to play the clips a speech pipeline has left, in order, then the whole answer as one track
+def play_speech(speech, player):
+    while speech.pending:
+        clip = speech.next_clip(block=True)
+        if clip is not None:
+            player.audio(clip, format="audio/wav", autoplay=True)
+    speech.wait_played()
+
+    if speech.errors:
+        st.error(f"Error generating audio: {speech.errors[0]}")
+    if speech.clips:
+        player.audio(tts.concatenate_wavs(speech.clips), format="audio/wav")
+
+# Function to stream the answer and speak it sentence by sentence while it is still being written
+def stream_with_speech(chunks, prefix, language_code):
+    text_box = st.empty()
+    player = st.empty()
+    speech = tts.SpeechPipeline(language_code)
+    speech.feed(prefix)
+
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        text_box.markdown("".join(parts) + "▌")
+        speech.feed(chunk)
+        # Never waits: a clip only comes back once it is synthesised and the previous one has played
+        clip = speech.next_clip()
+        if clip is not None:
+            player.audio(clip, format="audio/wav", autoplay=True)
+    response = "".join(parts)
+    text_box.markdown(response)
+
+    speech.close()
+    play_speech(speech, player)
+    return response, speech.first_clip_at
 
 # Developer function
 def developer():
@@ -3,17 +3,26 @@ from dotenv import load_dotenv
 
 load_dotenv()  
 
+import threading
+
 import streamlit as st
-import os
-import google.generativeai as genai
 from PIL import Image
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
+from streamlit_webrtc import webrtc_streamer, VideoProcessorBase
+from utils import bootstrap, registry
+from utils.analysis_cache import get_analysis_cache
+from utils.images import describe_savings, prepare_image, sharpness
+
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Bump when the prompt below changes so cached analyses from the old prompt are not reused
+PROMPT_VERSION = "1"
+PAGE_KEY = "label_scanner"
+
+# Frames scored per capture; the sharpest one is sent
+CAPTURE_WINDOW = 8
 
 
 def get_gemini_response(image):
-    model = genai.GenerativeModel('gemini-1.5-pro')
+    model = registry.get_gemini_model('gemini-1.5-pro')
     prompt = """
     You are an expert nutritionist. Analyze the food label from the image and provide the following information:
     1. Health rating out of 10.
@@ -31,31 +40,23 @@ def get_gemini_response(image):
 def input_image_setup(uploaded_file):
  
     if uploaded_file is not None:
-    
-        bytes_data = uploaded_file.getvalue()
-
-        image_parts = [
-            {
-                "mime_type": uploaded_file.type, 
-                "data": bytes_data
-            }
-        ]
-        return image_parts
+        # Rotate, downscale and re-encode before upload
+        image_part, report = prepare_image(uploaded_file.getvalue(), "label", uploaded_file.type)
+        st.caption(describe_savings(report))
+        return [image_part]
     else:
         raise FileNotFoundError("No file uploaded")
 
 
 def input_image_from_camera(image_data):
-    image_parts = [
-        {
-            "mime_type": "image/jpeg",
-            "data": image_data
-        }
-    ]
-    return image_parts
+    # Frames arrive as BGR arrays; encode them as a real JPEG at the label size
+    image_part, report = prepare_image(Image.fromarray(image_data[:, :, ::-1]), "label")
+    st.caption(describe_savings(report))
+    return [image_part]
 
 
 st.set_page_config(page_title="Label Reader Health App")
+bootstrap.start()
 
 
 st.title("Label Reader Health App 🧑‍⚕️")
@@ -65,7 +66,7 @@ Welcome to the Label Reader Health App! This app allows you to analyze food labe
 ### How to Use:
 1. **Upload an Image**: Click on the "Choose an image..." button to upload an image of a food label.
                                         **OR**
-   **Capture an Image**: Use the camera feature to capture an image of a food label.
+   **Capture an Image**: Start the camera, hold the label steady and click "Capture Label".
 3. **Analyze**: Click on the "Analyze Label" button to get the health analysis of the food label.
 
 The app will provide a health rating out of 10, indicate whether the food is healthy, list important constituents, and more.
@@ -77,42 +78,86 @@ uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png
 
 st.markdown("<h3 style='text-align: center;'>OR</h3>", unsafe_allow_html=True)
 
-class VideoTransformer(VideoTransformerBase):
-    def __init__(self):
-        self.image_data = None
+class LabelCaptureProcessor(VideoProcessorBase):
+    """Passes frames straight through until a capture is armed, then keeps the sharpest of the next few."""
 
-    def transform(self, frame):
-        self.image_data = frame.to_ndarray(format="bgr24")
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._best = None
+        self._best_score = -1.0
+        self.captured = threading.Event()
+        self.image_data = None    # BGR array of the last capture
+
+    def arm(self, window=CAPTURE_WINDOW):
+        with self._lock:
+            self._remaining = window
+            self._best = None
+            self._best_score = -1.0
+            self.captured.clear()
+
+    def recv(self, frame):
+        if not self._remaining:
+            return frame
+
+        image = frame.to_ndarray(format="bgr24")
+        score = sharpness(image)
+        with self._lock:
+            if self._remaining:
+                if score > self._best_score:
+                    self._best, self._best_score = image, score
+                self._remaining -= 1
+                if not self._remaining:
+                    self.image_data = self._best
+                    self.captured.set()
         return frame
 
-webrtc_ctx = webrtc_streamer(key="example", video_transformer_factory=VideoTransformer)
+webrtc_ctx = webrtc_streamer(key="example", video_processor_factory=LabelCaptureProcessor,
+                             media_stream_constraints={"video": True, "audio": False})
+
+if webrtc_ctx.video_processor and st.button("📸 Capture Label"):
+    processor = webrtc_ctx.video_processor
+    processor.arm()
+    if processor.captured.wait(timeout=5):
+        st.session_state.label_capture = input_image_from_camera(processor.image_data)
+    else:
+        st.warning("No frames received from the camera yet. Please try again.")
 
 image = ""
 if uploaded_file is not None:
     image = Image.open(uploaded_file)
     st.image(image, caption="Uploaded Image.", use_column_width=True)
-elif webrtc_ctx.video_transformer:
-    if webrtc_ctx.video_transformer.image_data is not None:
-        image = webrtc_ctx.video_transformer.image_data
-        st.image(image, caption="Captured Image.", use_column_width=True)
+elif st.session_state.get("label_capture"):
+    image = st.session_state.label_capture[0]["data"]
+    st.image(image, caption="Captured Image.", use_column_width=True)
 
 submit = st.button("Analyze Label")
 
 
 if submit:
+    image_data = None
+    image_bytes = None
     if uploaded_file is not None:
-        image_data = input_image_setup(uploaded_file)
-    elif webrtc_ctx.video_transformer and webrtc_ctx.video_transformer.image_data is not None:
-        image_data = input_image_from_camera(webrtc_ctx.video_transformer.image_data)
+        image_bytes = uploaded_file.getvalue()
+    elif st.session_state.get("label_capture"):
+        image_data = st.session_state.label_capture
+        image_bytes = image_data[0]["data"]
     else:
         st.error("No image provided")
-        image_data = None
 
-    if image_data:
-        response = get_gemini_response(image_data)
+    if image_bytes:
+        # The same label (or a near-identical capture of it) reuses the earlier answer
+        response, cached = get_analysis_cache().analyse(
+            PAGE_KEY, image_bytes, PROMPT_VERSION,
+            lambda: get_gemini_response(image_data or input_image_setup(uploaded_file)),
+        )
         st.subheader("The Response is")
+        if cached:
+            st.caption("Answered from an earlier analysis of this label")
         st.write(response)
 
+st.sidebar.caption(get_analysis_cache().summary(PAGE_KEY))
+
 # Footer
 st.markdown("""
     <style>
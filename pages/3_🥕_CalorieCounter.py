@@ -4,38 +4,36 @@ from dotenv import load_dotenv
 load_dotenv() ## load all the environment variables
 
 import streamlit as st
-import os
-import google.generativeai as genai
 from PIL import Image
+from utils import bootstrap, registry
+from utils.analysis_cache import get_analysis_cache
+from utils.images import describe_savings, prepare_image
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Bump when input_prompt changes so cached analyses from the old prompt are not reused
+PROMPT_VERSION = "1"
+PAGE_KEY = "calorie_counter"
 
 ## Function to load Google Gemini Pro Vision API And get response
 
 def get_gemini_repsonse(input,image,prompt):
-    model=genai.GenerativeModel('gemini-1.5-pro')
+    model=registry.get_gemini_model('gemini-1.5-pro')
     response=model.generate_content([input,image[0],prompt])
     return response.text
 
 def input_image_setup(uploaded_file):
     # Check if a file has been uploaded
     if uploaded_file is not None:
-        # Read the file into bytes
-        bytes_data = uploaded_file.getvalue()
-
-        image_parts = [
-            {
-                "mime_type": uploaded_file.type,  # Get the mime type of the uploaded file
-                "data": bytes_data
-            }
-        ]
-        return image_parts
+        # Rotate, downscale and re-encode before upload
+        image_part, report = prepare_image(uploaded_file.getvalue(), "food", uploaded_file.type)
+        st.caption(describe_savings(report))
+        return [image_part]
     else:
         raise FileNotFoundError("No file uploaded")
     
 ##initialize our streamlit app
 
 st.set_page_config(page_title="Calorie count Health App")
+bootstrap.start()
 
 st.header("Calorie Counter AI")
 input=st.text_input("Input Prompt: ",key="input")
@@ -64,11 +62,20 @@ You are an expert in nutritionist where you need to see the food items from the
 ## If submit button is clicked
 
 if submit:
-    image_data=input_image_setup(uploaded_file)
-    response=get_gemini_repsonse(input_prompt,image_data,input)
+    # The same photo (or a near-identical one) with the same prompt reuses the earlier answer
+    image_bytes = uploaded_file.getvalue() if uploaded_file is not None else b""
+    response, cached = get_analysis_cache().analyse(
+        PAGE_KEY, image_bytes, PROMPT_VERSION,
+        lambda: get_gemini_repsonse(input_prompt, input_image_setup(uploaded_file), input),
+        extra=input,
+    )
     st.subheader("The Response is")
+    if cached:
+        st.caption("Answered from an earlier analysis of this image")
     st.write(response)
 
+st.sidebar.caption(get_analysis_cache().summary(PAGE_KEY))
+
 
 
 st.markdown("""
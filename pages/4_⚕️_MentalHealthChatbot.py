@@ -1,7 +1,8 @@
 import streamlit as st
-from groq import Groq
 import dotenv
 import os
+from utils import bootstrap, registry
+from utils.streaming import iter_chat_deltas
 
 # Page Configuration
 st.set_page_config(
@@ -10,12 +11,13 @@ st.set_page_config(
     layout="wide", 
     initial_sidebar_state="expanded"
 )
+bootstrap.start()
 
 
 # Load environment variables
 dotenv.load_dotenv()
 api_key = os.getenv("GROQ_API_KEY")
-client = Groq()
+client = registry.get_groq_client()
 
 # Enhanced Custom CSS
 st.markdown("""
@@ -95,7 +97,12 @@ with st.sidebar.container():
 
 # Function to analyze mental health problems
 def analyze_mental_problem(prompt, location):
-    """Send the user prompt and location to the Groq API for mental health analysis."""
+    """Stream the Groq mental health analysis for the prompt and location, yielding text deltas.
+
+    The text received so far is mirrored into st.session_state.mh_response, so an
+    answer that is stopped or cut off by a dropped connection is not lost.
+    """
+    result = st.session_state.mh_response = {"text": "", "status": "streaming"}
     try:
         messages = [{
             "role": "user",
@@ -131,12 +138,26 @@ def analyze_mental_problem(prompt, location):
             stream=True,
             stop=None
         )
-        response_text = ""
-        for chunk in response:
-            response_text += chunk.choices[0].delta.content or ""
-        return response_text
+        for delta in iter_chat_deltas(response):
+            result["text"] += delta
+            yield delta
+        result["status"] = "done"
     except Exception as e:
-        return f"Error: Could not process the prompt. {e}"
+        if result["text"]:
+            result["status"] = "interrupted"
+            yield f"\n\n⚠️ The connection dropped before the answer was complete. {e}"
+        else:
+            result["status"] = "error"
+            result["text"] = f"Error: Could not process the prompt. {e}"
+            yield result["text"]
+
+# Function to show the therapist suggestions for a finished answer
+def show_recommendations(response):
+    if any(phrase in response.lower() for phrase in ["problem identified", "clear understanding"]):
+        st.markdown("### 🩺 Recommended Mental Health Professionals")
+        st.write("✅ Therapist 1: [Personalized Match]")
+        st.write("✅ Therapist 2: [Nearby Professional]")
+        st.write("✅ Therapist 3: [Expert Recommendation]")
 
 # Streamlit UI
 st.markdown("<h1 class='stTitle'>🧠 Mental Wellness Chatbot</h1>", unsafe_allow_html=True)
@@ -176,17 +197,25 @@ if submit_button:
     else:
         location = f"{city}, {state}, {country}"
 
-        with st.spinner("Analyzing your input with empathy..."):
-            response = analyze_mental_problem(prompt, location)
-        
         st.success("🌟 Our Compassionate Insights:")
-        st.markdown(response)
-
-        if any(phrase in response.lower() for phrase in ["problem identified", "clear understanding"]):
-            st.markdown("### 🩺 Recommended Mental Health Professionals")
-            st.write("✅ Therapist 1: [Personalized Match]")
-            st.write("✅ Therapist 2: [Nearby Professional]")
-            st.write("✅ Therapist 3: [Expert Recommendation]")
+        # Any click reruns the script, which interrupts the stream and closes the connection
+        st.button("⏹️ Stop generating")
+        st.write_stream(analyze_mental_problem(prompt, location))
+        show_recommendations(st.session_state.mh_response["text"])
+elif "mh_response" in st.session_state:
+    # Rerun after the answer finished or was stopped: keep showing what we received
+    result = st.session_state.mh_response
+    if result["status"] == "streaming":
+        result["status"] = "stopped"
+
+    st.success("🌟 Our Compassionate Insights:")
+    st.markdown(result["text"])
+    if result["status"] == "stopped":
+        st.caption("⏹️ Generation stopped. Showing the partial answer.")
+    elif result["status"] == "interrupted":
+        st.caption("⚠️ The connection dropped. Showing the partial answer.")
+    elif result["status"] == "done":
+        show_recommendations(result["text"])
 
 # Sidebar Footer
 with st.sidebar:
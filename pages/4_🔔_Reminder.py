@@ -1,46 +1,23 @@
 import streamlit as st
-from datetime import datetime, time
-import pytz
-import schedule
-import time as t
-import threading
-from twilio.rest import Client
-import google.generativeai as genai
+from datetime import datetime
+from dotenv import load_dotenv
+from utils import bootstrap
+from utils.health_facts import get_fact_pool
+from utils.reminder_alerts import get_reminder_dispatcher, send_alert, start_reminders
+from utils.reminders import IST
 
-# Replace these with your actual credentials
-TWILIO_ACCOUNT_SID = ''
-TWILIO_AUTH_TOKEN = ''
-TWILIO_WHATSAPP_NUMBER = ''
-TWILIO_SMS_NUMBER = ''
-USER_WHATSAPP_NUMBER = ''
-USER_SMS_NUMBER = ''
+load_dotenv()
+bootstrap.start()
 
-# Replace with your actual Gemini API key
-GEMINI_API_KEY = ''
+# Queued, rate-limited delivery shared by the scheduler and every session (Twilio settings in .env)
+dispatcher = get_reminder_dispatcher()
 
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# Pre-generated facts, refilled from Gemini in the background
+fact_pool = get_fact_pool()
 
-# IST timezone
-IST = pytz.timezone('Asia/Kolkata')
-
-# Initialize session state
-if "reminders" not in st.session_state:
-    st.session_state.reminders = []
-
-if "scheduler_started" not in st.session_state:
-    st.session_state.scheduler_started = False
-
-# Function to generate a health fact
+# Function to get a health fact (from the pool; never waits on Gemini)
 def generate_health_fact():
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = "Generate a short, interesting health fact or health tip that would be motivational and informative. Keep it concise (1-2 sentences)."
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        print(f"Error generating health fact: {e}")
-        return "Stay hydrated and active for better health!"
+    return fact_pool.take()
 
 # CSS Styling (same as previous code)
 st.markdown("""
@@ -105,84 +82,17 @@ with st.sidebar.container():
         st.markdown("- Multiple Notification Channels")
         st.markdown("- Daily Health Facts")
 
-# Function to send a WhatsApp message
+# Function to send a WhatsApp message (queued; delivered in the background)
 def send_whatsapp_message(message):
-    try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=message,
-            from_=TWILIO_WHATSAPP_NUMBER,
-            to=USER_WHATSAPP_NUMBER
-        )
-        print(f"WhatsApp message sent: {message}")
-    except Exception as e:
-        print(f"Error sending WhatsApp message: {e}")
+    send_alert("WhatsApp", message)
 
-# Function to send an SMS message
+# Function to send an SMS message (queued; delivered in the background)
 def send_sms_message(message):
-    try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=message,
-            from_=TWILIO_SMS_NUMBER,
-            to=USER_SMS_NUMBER
-        )
-        print(f"SMS message sent: {message}")
-    except Exception as e:
-        print(f"Error sending SMS message: {e}")
-
-# Function to trigger a reminder
-def trigger_reminder(reminder):
-    # Generate a health fact
-    health_fact = generate_health_fact()
-    
-    message = reminder["message"]
-    reminder_time = reminder["datetime"].strftime('%Y-%m-%d %H:%M:%S %Z')
-    full_message = f"⏰ Reminder Alert! 📅\nMessage: {message}\nTime: {reminder_time}\n\n💡 Health Tip: {health_fact}"
-    
-    # Send notifications based on the selected options
-    if "WhatsApp" in reminder["channels"]:
-        send_whatsapp_message(full_message)
-    if "SMS" in reminder["channels"]:
-        send_sms_message(full_message)
-
-# Schedule a reminder
-def schedule_reminder(reminder):
-    def job():
-        # Check if the reminder is "Once" and already triggered
-        if reminder["frequency"] == "Once" and reminder["triggered"]:
-            return schedule.CancelJob  # Cancel the job if already triggered
+    send_alert("SMS", message)
 
-        # Trigger the reminder
-        trigger_reminder(reminder)
-
-        # Mark one-time reminder as triggered and cancel the job
-        if reminder["frequency"] == "Once":
-            reminder["triggered"] = True
-            return schedule.CancelJob
-
-    # Schedule based on frequency
-    reminder_time = reminder["datetime"].strftime('%H:%M')
-    if reminder["frequency"] == "Daily":
-        schedule.every().day.at(reminder_time).do(job)
-    elif reminder["frequency"] == "Weekly":
-        schedule.every().week.at(reminder_time).do(job)
-    elif reminder["frequency"] == "Once":
-        # Schedule for a one-time trigger
-        schedule.every().day.at(reminder_time).do(job)
-
-    print(f"Scheduled: {reminder['message']} at {reminder['datetime']} ({reminder['frequency']})")
-
-# Run the scheduler in a separate thread
-def run_scheduler():
-    while True:
-        schedule.run_pending()
-        t.sleep(1)
-
-if not st.session_state.scheduler_started:
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
-    st.session_state.scheduler_started = True
+# One scheduler per process, shared by every session and already running from whichever page loaded first;
+# due reminders are sent by utils.reminder_alerts, so they fire even if nobody opens this page
+scheduler = start_reminders()
 
 # Streamlit UI
 st.title("⏰ Health Care Assistant - Reminder Setup   \n")
@@ -212,22 +122,13 @@ if st.button("Set Reminder", use_container_width=True, help="Click to schedule y
     elif not reminder_channels:
         st.error("Please select at least one notification channel.")
     else:
-        # Combine date and time
-        reminder_datetime = datetime.combine(reminder_date, reminder_time).astimezone(IST)
+        # Combine date and time (entered in IST)
+        reminder_datetime = IST.localize(datetime.combine(reminder_date, reminder_time))
 
         if reminder_datetime <= datetime.now(IST):
             st.error("Reminder time must be in the future.")
         else:
-            reminder = {
-                "message": reminder_message,
-                "datetime": reminder_datetime,
-                "frequency": reminder_frequency,
-                "channels": reminder_channels,
-                "triggered": False
-            }
-            st.session_state.reminders.append(reminder)
-            
-            schedule_reminder(reminder)
+            scheduler.add(reminder_message, reminder_datetime, reminder_frequency, reminder_channels)
 
             # Success message
             st.success(f"Reminder set successfully! 📅\nMessage: '{reminder_message}'\nTime: {reminder_datetime.strftime('%Y-%m-%d %H:%M:%S %Z')}\nFrequency: {reminder_frequency}\nChannels: {', '.join(reminder_channels)}")
@@ -246,9 +147,10 @@ if st.button("Set Reminder", use_container_width=True, help="Click to schedule y
                     send_sms_message(confirmation_message)
 
 # Display active reminders
-if st.session_state.reminders:
+upcoming_reminders = scheduler.store.upcoming(limit=20)
+if upcoming_reminders:
     st.subheader("📋 Scheduled Reminders:")
-    for idx, reminder in enumerate(st.session_state.reminders, 1):
+    for idx, reminder in enumerate(upcoming_reminders, 1):
         st.write(f"**{idx}.** {reminder['message']} - {reminder['datetime'].strftime('%Y-%m-%d %H:%M:%S %Z')} ({reminder['frequency']}) via {', '.join(reminder['channels'])}")
 
 def print_praise():
@@ -267,6 +169,15 @@ with st.sidebar:
     st.write("---")
     st.success(print_praise())
     st.write("---")
+
+    with st.expander("📨 Delivery metrics", expanded=False):
+        delivery = dispatcher.metrics()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Sent", delivery["sent"])
+        col2.metric("Queued", delivery["queue_depth"])
+        col3.metric("Failed", delivery["failed"])
+        st.caption(f"Retries: {delivery['retried']} · Dropped: {delivery['dropped']} · "
+                   f"Avg delivery: {delivery['avg_delivery_s'] or 0:.1f}s")
     
     st.markdown(
         "<h3 style='text-align: center;'>Developed with ❤️ for GenAI by <a style='text-decoration: none' href='https://www.linkedin.com/in/sanskar-khandelwal-611249210/'>Team Manthan</a></h3>",
@@ -1,16 +1,15 @@
 from dotenv import load_dotenv
 import streamlit as st
-import os
-import google.generativeai as genai
 from PIL import Image
-import pdfplumber
+from utils import bootstrap, registry
+from utils.analysis_cache import get_analysis_cache
+from utils.images import describe_savings, prepare_image
+from utils.document_analysis import map_reduce
+from utils.pdf import MAX_PAGES, MIN_TEXT_CHARS, extract_pdf_content, iter_pdf_pages
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini AI
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
 # --- Page Config ---
 st.set_page_config(
     page_title="Click Clinic - Medical Document Analyzer",
@@ -18,10 +17,15 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded",
 )
+bootstrap.start()
+
+# Bump when input_prompt changes so cached analyses from the old prompt are not reused
+PROMPT_VERSION = "1"
+PAGE_KEY = "prescription_reader"
 
 # Function definitions (keeping existing functions)
 def get_gemini_response(input_text, image, prompt):
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    model = registry.get_gemini_model('gemini-1.5-flash')
     inputs = []
     if input_text:
         inputs.append(input_text)
@@ -34,26 +38,18 @@ def get_gemini_response(input_text, image, prompt):
     response = model.generate_content(inputs)
     return response.text if response and hasattr(response, 'text') else None
 
-def extract_pdf_text(pdf_file):
-    try:
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text()
-            return text
-    except Exception as e:
-        raise RuntimeError(f"Error extracting text from PDF: {e}")
+def get_gemini_response_from_parts(parts, prompt):
+    # Text and image parts in page order, then the instructions
+    model = registry.get_gemini_model('gemini-1.5-flash')
+    response = model.generate_content([*parts, prompt])
+    return response.text if response and hasattr(response, 'text') else None
 
 def input_image_setup(uploaded_file):
     if uploaded_file is not None:
-        bytes_data = uploaded_file.getvalue()
-        image_parts = [
-            {
-                "mime_type": uploaded_file.type,
-                "data": bytes_data
-            }
-        ]
-        return image_parts
+        # Straighten, downscale and clean up the scan before upload
+        image_part, report = prepare_image(uploaded_file.getvalue(), "document", uploaded_file.type)
+        st.caption(describe_savings(report))
+        return [image_part]
     else:
         raise FileNotFoundError("No file uploaded or captured")
 
@@ -138,6 +134,9 @@ with st.sidebar:
         st.markdown("- Lab Report Interpretation")
         st.markdown("- PDF Text Extraction")
     
+    st.caption(get_analysis_cache().summary(PAGE_KEY))
+    max_pages = st.number_input("📄 PDF page limit", min_value=1, max_value=500, value=MAX_PAGES,
+                                help="Only the first pages of long PDFs are read")
     st.write("---")
     st.success(print_praise())
     st.write("---")
@@ -190,9 +189,19 @@ if image:
     st.markdown('<div class="result-card">', unsafe_allow_html=True)
     if image_source == "upload" and uploaded_file.type == "application/pdf":
         try:
-            pdf_text = extract_pdf_text(image)
+            # Pages appear as they are extracted; the text is cached for the analysis below
             st.markdown("### 📄 Extracted PDF Text")
-            st.text_area("", pdf_text, height=300)
+            progress = st.progress(0.0, text="Extracting text...")
+            preview = st.empty()
+            pages = []
+            for number, count, text in iter_pdf_pages(image.getvalue(), max_pages):
+                pages.append(text)
+                progress.progress(number / count, text=f"Extracted page {number} of {count}")
+                if len(text.strip()) < MIN_TEXT_CHARS:
+                    text = "(No text layer: this page will be read as an image)"
+                preview.text(f"--- Page {number} ---\n{text[:500]}")
+            progress.empty()
+            preview.text_area("", "\n\n".join(text for text in pages if text), height=300)
         except Exception as e:
             st.error(f"Error processing PDF: {e}")
     else:
@@ -213,18 +222,19 @@ if st.button("🔍 Analyze Document", key="analyze_button", use_container_width=
     if image:
         try:
             with st.spinner("Analyzing document... Please wait"):
-                input_text = ""
-                image_data = None
+                pdf_pages = []
+                image_bytes = None
 
                 if image_source == "upload" and uploaded_file.type == "application/pdf":
-                    input_text = extract_pdf_text(image)
-                    if not input_text.strip():
-                        st.warning("⚠️ The PDF appears to be empty or contains no readable text.")
+                    # Text pages go as text, scanned pages as compressed images
+                    pdf_pages = extract_pdf_content(image.getvalue(), max_pages)
+                    if not any("image" in page or page["text"].strip() for page in pdf_pages):
+                        st.warning("⚠️ The PDF appears to be empty.")
                         st.stop()
                 else:
-                    image_data = input_image_setup(image)
+                    image_bytes = image.getvalue()
 
-                if not input_text and not image_data:
+                if not pdf_pages and not image_bytes:
                     st.warning("⚠️ No valid data found in the uploaded document.")
                     st.stop()
 
@@ -247,7 +257,23 @@ if st.button("🔍 Analyze Document", key="analyze_button", use_container_width=
                 Please ensure the response is clear, concise, and professionally formatted.
                 """
 
-                response = get_gemini_response(input_text, image_data, input_prompt)
+                if image_bytes:
+                    # The same document (or a near-identical photo of it) reuses the earlier answer
+                    response, cached = get_analysis_cache().analyse(
+                        PAGE_KEY, image_bytes, PROMPT_VERSION,
+                        lambda: get_gemini_response("", input_image_setup(image), input_prompt),
+                    )
+                    if cached:
+                        st.caption("Answered from an earlier analysis of this document")
+                else:
+                    # Long documents are analysed in chunks concurrently, then merged into one report
+                    progress = st.progress(0.0, text="Analyzing document...")
+                    response = map_reduce(
+                        pdf_pages, input_prompt, get_gemini_response_from_parts,
+                        on_progress=lambda done, total: progress.progress(
+                            done / total, text=f"Analyzed {done} of {total} parts"),
+                    )
+                    progress.empty()
 
                 if response:
                     st.markdown('<div class="result-card">', unsafe_allow_html=True)
@@ -0,0 +1,33 @@
+"""Build (or extend) the medical reference index used by HealthDecoder.
+
+Usage:
+    python scripts/build_medical_index.py data/medical_corpus
+    python scripts/build_medical_index.py data/medical_corpus --append
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.retrieval import INDEX_DIR, IndexBuilder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", help="folder of .txt / .jsonl reference documents")
+    parser.add_argument("--out", default=INDEX_DIR, help=f"index directory (default: {INDEX_DIR})")
+    parser.add_argument("--batch-size", type=int, default=256, help="passages embedded per batch")
+    parser.add_argument("--append", action="store_true", help="only index files not already in the index")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    builder = IndexBuilder(args.out, batch_size=args.batch_size)
+    added = builder.build(args.corpus_dir, append=args.append)
+    print(f"Indexed {added} passages into {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Minimal stand-in for the Twilio Messages API, for exercising the reminder dispatcher locally.
+
+Usage:
+    python scripts/fake_twilio.py --port 8765 --fail-rate 0.2
+    TWILIO_API_BASE_URL=http://localhost:8765 streamlit run Main.py
+
+Every accepted message is printed; with --fail-rate a share of requests get a
+429 or 503 so retries and backoff can be observed.
+"""
+
+import argparse
+import json
+import random
+import re
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MESSAGES_PATH = re.compile(r"^/2010-04-01/Accounts/(?P<sid>[^/]+)/Messages\.json$")
+
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        match = MESSAGES_PATH.match(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        if not match:
+            self._reply(404, {"code": 20404, "message": "Not found", "status": 404})
+            return
+        if random.random() < self.fail_rate:
+            status = random.choice([429, 503])
+            self._reply(status, {"code": 20429 if status == 429 else 20503, "message": "Simulated failure", "status": status})
+            return
+
+        print(f"{form.get('From')} -> {form.get('To')}: {form.get('Body')!r}")
+        self._reply(201, {
+            "sid": "SM" + uuid.uuid4().hex,
+            "account_sid": match.group("sid"),
+            "from": form.get("From"),
+            "to": form.get("To"),
+            "body": form.get("Body"),
+            "status": "queued",
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 429/503")
+    args = parser.parse_args()
+
+    FakeTwilioHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeTwilioHandler)
+    print(f"Fake Twilio listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
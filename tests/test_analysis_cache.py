@@ -0,0 +1,78 @@
+"""Analyses are reused only where that is safe, and their hashes leave with them."""
+
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from utils.analysis_cache import AnalysisCache, dhash
+from utils.disk_cache import DiskLRU
+
+
+def _image(shade):
+    buffer = io.BytesIO()
+    Image.linear_gradient("L").point(lambda v: (v + shade) % 256).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _hash_keys(results):
+    with results.transaction() as conn:
+        return {key for (key,) in conn.execute("SELECT key FROM image_hashes")}
+
+
+def test_eviction_prunes_image_hashes(tmp_path):
+    results = DiskLRU(str(tmp_path / "analyses.sqlite3"), max_bytes=2500)
+    cache = AnalysisCache(results)
+    for shade in range(0, 200, 20):
+        cache.store("calorie_counter", _image(shade), "1", "x" * 1000)
+
+    stats = results.stats()
+    assert stats["bytes"] <= 2500
+    with results.transaction() as conn:
+        stored = {key for (key,) in conn.execute("SELECT key FROM entries")}
+    assert _hash_keys(results) == stored
+    assert len(stored) == stats["entries"]
+
+
+def test_orphaned_hashes_are_dropped_on_open(tmp_path):
+    path = str(tmp_path / "analyses.sqlite3")
+    results = DiskLRU(path)
+    AnalysisCache(results).store("calorie_counter", _image(0), "1", "analysis")
+    with results.transaction() as conn:
+        conn.execute("DELETE FROM entries")
+
+    reopened = DiskLRU(path)
+    AnalysisCache(reopened)
+    assert _hash_keys(reopened) == set()
+
+
+def _prescription(drug):
+    page = Image.new("L", (600, 800), 255)
+    draw = ImageDraw.Draw(page)
+    draw.rectangle((0, 0, 600, 120), fill=40)
+    draw.text((30, 40), "CITY CLINIC  -  Dr. A. Sharma, MBBS", fill=255)
+    draw.text((40, 300), f"Rx: {drug}", fill=0)
+    buffer = io.BytesIO()
+    page.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("page", ["prescription_reader", "label_scanner"])
+def test_same_template_documents_never_share_an_analysis(tmp_path, page):
+    warfarin, insulin = _prescription("Warfarin 5 mg once daily"), _prescription("Insulin 10 units before meals")
+    assert bin(dhash(warfarin) ^ dhash(insulin)).count("1") <= 10    # close enough to near-hit on a food page
+
+    cache = AnalysisCache(DiskLRU(str(tmp_path / "analyses.sqlite3")))
+    assert cache.analyse(page, warfarin, "1", lambda: "Patient on WARFARIN") == ("Patient on WARFARIN", False)
+    assert cache.analyse(page, insulin, "1", lambda: "Patient on INSULIN") == ("Patient on INSULIN", False)
+    assert cache.analyse(page, warfarin, "1", lambda: "recomputed") == ("Patient on WARFARIN", True)
+
+
+def test_food_photos_still_reuse_near_identical_images(tmp_path):
+    cache = AnalysisCache(DiskLRU(str(tmp_path / "analyses.sqlite3")))
+    photo = Image.open(io.BytesIO(_image(0)))
+    recapture = io.BytesIO()
+    photo.save(recapture, format="JPEG", quality=70)
+
+    cache.analyse("calorie_counter", _image(0), "1", lambda: "Rice, 350 kcal")
+    assert cache.analyse("calorie_counter", recapture.getvalue(), "1", lambda: "new") == ("Rice, 350 kcal", True)
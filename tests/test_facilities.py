@@ -0,0 +1,59 @@
+"""The local facility dataset answers Places queries: right types, within the radius, nearest first."""
+
+import pytest
+
+facilities = pytest.importorskip("utils.facilities")
+
+# Around Connaught Place, New Delhi
+LAT, LON = 28.6315, 77.2167
+
+
+@pytest.fixture
+def provider():
+    rows = [
+        ("Central Pharmacy", 0.005, ["pharmacy"]),
+        ("City Hospital", 0.02, ["Hospitals", "pharmacy"]),
+        ("Lab One Diagnostics", 0.01, ["Diagnosis"]),
+        ("Ring Road Hospital", 0.04, ["hospital"]),
+        ("Gurgaon Hospital", 0.2, ["hospital"]),
+    ]
+    return facilities.FacilityProvider(
+        names=[name for name, _, _ in rows],
+        addresses=["New Delhi"] * len(rows),
+        latitudes=[LAT + offset for _, offset, _ in rows],
+        longitudes=[LON] * len(rows),
+        types=[types for _, _, types in rows],
+    )
+
+
+def _names(predictions):
+    return [p["structured_formatting"]["main_text"] for p in predictions]
+
+
+@pytest.mark.parametrize("service_type, expected", [
+    ("Hospitals ", "hospital"),
+    ("Pharmacies", "pharmacy"),
+    ("pharmacy", "pharmacy"),
+    ("Diagnosis", "diagnosis"),
+    ("clinics", "clinic"),
+    ("Eye  Hospitals", "eye hospital"),
+])
+def test_type_key(service_type, expected):
+    assert facilities.type_key(service_type) == expected
+
+
+def test_radius_type_filter_and_distance_order(provider):
+    results = provider.nearby(LAT, LON, "hospitals", 5000)
+    assert _names(results) == ["City Hospital", "Ring Road Hospital"]
+    assert [r["distance_meters"] for r in results] == sorted(r["distance_meters"] for r in results)
+    assert all(r["distance_meters"] <= 5000 for r in results)
+
+
+def test_plural_search_matches_singular_rows(provider):
+    assert _names(provider.nearby(LAT, LON, "Pharmacies", 5000)) == ["Central Pharmacy", "City Hospital"]
+    assert _names(provider.nearby(LAT, LON, "diagnosis", 5000)) == ["Lab One Diagnostics"]
+
+
+def test_no_type_returns_everything_in_range(provider):
+    assert _names(provider.nearby(LAT, LON, "", 3000)) == ["Central Pharmacy", "Lab One Diagnostics", "City Hospital"]
+    assert provider.nearby(LAT, LON, "dentist", 50000) == []
@@ -0,0 +1,88 @@
+"""The reminder dispatcher against the local fake Twilio endpoint (scripts/fake_twilio.py)."""
+
+import importlib.util
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("twilio")
+
+from utils.notifications import NotificationDispatcher, build_twilio_client
+
+ACCOUNT_SID = "AC" + "0" * 32
+
+
+def _load_fake_twilio():
+    path = os.path.join(os.path.dirname(__file__), "..", "scripts", "fake_twilio.py")
+    spec = importlib.util.spec_from_file_location("fake_twilio", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fake_twilio(monkeypatch):
+    """Start the fake on an ephemeral port; returns a function setting its fail rate."""
+    fake = _load_fake_twilio()
+
+    class Handler(fake.FakeTwilioHandler):
+        fail_rate = 0.0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("TWILIO_API_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+
+    def set_fail_rate(rate):
+        Handler.fail_rate = rate
+
+    yield set_fail_rate
+    server.shutdown()
+    server.server_close()
+
+
+def _dispatch(count, max_attempts):
+    dispatcher = NotificationDispatcher(
+        lambda: build_twilio_client(ACCOUNT_SID, "token"),
+        senders={"SMS": ("+15005550006", "+919999999999")},
+        rates={"SMS": 1000.0},
+        workers=2,
+        max_attempts=max_attempts,
+        base_delay=0.01,
+    )
+    for i in range(count):
+        assert dispatcher.submit("SMS", f"Reminder {i}")
+
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        metrics = dispatcher.metrics()
+        if metrics["sent"] + metrics["failed"] == count:
+            return metrics
+        time.sleep(0.02)
+    pytest.fail(f"Deliveries did not finish: {dispatcher.metrics()}")
+
+
+def test_all_messages_sent(fake_twilio):
+    metrics = _dispatch(10, max_attempts=3)
+    assert (metrics["sent"], metrics["retried"], metrics["failed"]) == (10, 0, 0)
+    assert metrics["by_channel"]["SMS.sent"] == 10
+    assert metrics["avg_delivery_s"] is not None
+
+
+def test_throttled_messages_are_retried_until_sent(fake_twilio):
+    random.seed(7)
+    fake_twilio(0.5)
+    metrics = _dispatch(10, max_attempts=30)
+    assert metrics["sent"] == 10
+    assert metrics["failed"] == 0
+    assert metrics["retried"] > 0
+
+
+def test_messages_fail_after_max_attempts(fake_twilio):
+    fake_twilio(1.0)
+    metrics = _dispatch(4, max_attempts=3)
+    assert (metrics["sent"], metrics["failed"]) == (0, 4)
+    assert metrics["retried"] == 4 * 2
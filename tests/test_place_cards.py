@@ -0,0 +1,21 @@
+"""Cached card HTML must follow the predictions, not just the result id."""
+
+from utils.place_cards import render_cards
+
+
+def _predictions(*names):
+    return [{"structured_formatting": {"main_text": name, "secondary_text": "MG Road"}, "distance_m": 800}
+            for name in names]
+
+
+def test_refreshed_predictions_are_rendered_again():
+    old = render_cards("28.61,77.20|hospital|5000|Delhi", _predictions("City Hospital"), "Delhi", 12)
+    new = render_cards("28.61,77.20|hospital|5000|Delhi", _predictions("Apollo Clinic"), "Delhi", 12)
+    assert "City Hospital" in old
+    assert "Apollo Clinic" in new and "City Hospital" not in new
+
+
+def test_same_predictions_reuse_the_fragment():
+    first = render_cards("same", _predictions("A", "B"), "Pune", 1)
+    assert render_cards("same", _predictions("A", "B"), "Pune", 1) is first
+    assert "B" not in first
@@ -0,0 +1,86 @@
+"""Place searches: normalised and cached, but answered as if made at the user's own location."""
+
+import math
+
+import pytest
+
+from utils.geo import geohash_bounds, geohash_center, geohash_encode, geohash_half_diagonal_m, haversine_m
+from utils.ttl_cache import TTLCache
+
+
+def test_half_diagonal_reaches_every_corner():
+    cell = geohash_encode(28.6139, 77.2090)
+    center = geohash_center(cell)
+    (lat_min, lat_max), (lon_min, lon_max) = geohash_bounds(cell)
+    corners = [(lat, lon) for lat in (lat_min, lat_max) for lon in (lon_min, lon_max)]
+    assert max(float(haversine_m(*center, *corner)) for corner in corners) <= geohash_half_diagonal_m(cell) + 1e-6
+
+
+@pytest.fixture
+def places():
+    return pytest.importorskip("utils.places")
+
+
+def test_search_pads_radius_by_half_diagonal(places):
+    class RecordingProvider(places.PlacesProvider):
+        def nearby(self, lat, lon, service_type, radius_m):
+            self.call = (lat, lon, radius_m)
+            return []
+
+    provider = RecordingProvider()
+    lat, lon = 28.6139, 77.2090
+    places.PlacesClient(provider, TTLCache()).search(lat, lon, "hospital", 5000)
+
+    center_lat, center_lon, radius = provider.call
+    offset = float(haversine_m(lat, lon, center_lat, center_lon))
+    assert radius >= 5000 + offset
+    assert radius == 5000 + math.ceil(geohash_half_diagonal_m(geohash_encode(lat, lon)))
+
+
+def _prediction(name, address="MG Road", **extra):
+    return {"structured_formatting": {"main_text": name, "secondary_text": address}, **extra}
+
+
+def _static_provider(places, results, cacheable=True):
+    class StaticProvider(places.PlacesProvider):
+        def nearby(self, lat, lon, service_type, radius_m):
+            return results.get(service_type, [])
+
+    provider = StaticProvider()
+    provider.cacheable = cacheable
+    return provider
+
+
+@pytest.mark.parametrize("cacheable, expected", [(True, None), (False, 900)])
+def test_provider_distance_only_trusted_when_called_at_the_user(places, cacheable, expected):
+    provider = _static_provider(places, {"clinic": [_prediction("No Geometry Clinic", distance_meters=900)]}, cacheable)
+    [result] = places.PlacesClient(provider, TTLCache()).search_many(28.6139, 77.2090, "clinic", 5000)
+    assert result["distance_m"] == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Dentist, Hospital", ["dentist", "hospital"]),
+    ("clinic / pharmacy;  Dentist", ["clinic", "pharmacy", "dentist"]),
+    ("Obstetrics and gynaecology", ["obstetrics and gynaecology"]),
+    ("Ear, nose and throat", ["ear, nose and throat"]),
+    ("Ear, Nose & Throat, dentist", ["ear, nose & throat", "dentist"]),
+    ("hospital, Hospital ,, ", ["hospital"]),
+    ("", []),
+])
+def test_split_service_types(places, text, expected):
+    assert places.split_service_types(text) == expected
+
+
+def test_search_many_merges_dedupes_and_sorts_by_distance(places):
+    lat, lon = 28.6139, 77.2090
+    near = _prediction("City Hospital", geometry={"location": {"lat": lat + 0.01, "lng": lon}})
+    far = _prediction("Apollo Clinic", geometry={"location": {"lat": lat + 0.03, "lng": lon}})
+    outside = _prediction("Far Away Hospital", geometry={"location": {"lat": lat + 0.5, "lng": lon}})
+    same_place = _prediction("city  hospital", address="MG Road.",
+                             geometry={"location": {"lat": lat + 0.01, "lng": lon}})
+    provider = _static_provider(places, {"hospital": [far, near, outside], "clinic": [same_place, far]})
+
+    results = places.PlacesClient(provider, TTLCache()).search_many(lat, lon, "Hospital, clinic", 5000)
+
+    assert [r["structured_formatting"]["main_text"] for r in results] == ["City Hospital", "Apollo Clinic"]
+    assert results[0]["distance_m"] < results[1]["distance_m"] < 5000
@@ -0,0 +1,42 @@
+"""A slow factory must only hold up callers of its own key."""
+
+import threading
+
+from utils import registry
+
+
+def test_slow_factory_does_not_block_other_keys():
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    thread = threading.Thread(target=registry.get_shared, args=("test_slow", slow))
+    thread.start()
+    started.wait(5)
+    try:
+        assert registry.get_shared("test_fast", lambda: "fast") == "fast"
+    finally:
+        release.set()
+        thread.join()
+    assert registry.get_shared("test_slow", lambda: "rebuilt") == "slow"
+
+
+def test_concurrent_callers_share_one_instance():
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def build():
+        calls.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: (barrier.wait(), results.append(registry.get_shared("test_once", build))))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len({id(r) for r in results}) == 1
@@ -0,0 +1,96 @@
+"""Reminder scheduling: firing order, recovery after a restart and repeat catch-up."""
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from utils.reminders import IST, PERIODS, ReminderScheduler, ReminderStore, next_due
+
+DAY = PERIODS["Daily"]
+WEEK = PERIODS["Weekly"]
+
+
+class Recorder:
+    """Scheduler handler that records fired reminder ids and lets a test wait for them."""
+
+    def __init__(self):
+        self.fired = []
+        self._cond = threading.Condition()
+
+    def __call__(self, reminder):
+        with self._cond:
+            self.fired.append(reminder["id"])
+            self._cond.notify_all()
+
+    def wait_for(self, count, timeout=5):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.fired) >= count, timeout), self.fired
+        return self.fired
+
+
+def _at(timestamp):
+    return datetime.fromtimestamp(timestamp, IST)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReminderStore(str(tmp_path / "reminders.sqlite3"))
+
+
+@pytest.mark.parametrize("frequency, due_offset, expected_offset", [
+    ("Once", -10, None),
+    ("Daily", -10, DAY - 10),                      # fired late: next one keeps the original time of day
+    ("Daily", -2.5 * DAY, 0.5 * DAY),              # missed two days while down: skip to the next one
+    ("Weekly", -3 * DAY, WEEK - 3 * DAY),
+    ("Weekly", -15 * DAY, 3 * WEEK - 15 * DAY),
+])
+def test_next_due_catches_up_on_missed_occurrences(frequency, due_offset, expected_offset):
+    now = 1_700_000_000.0
+    following = next_due(now + due_offset, frequency, now)
+    assert following == (None if expected_offset is None else pytest.approx(now + expected_offset))
+
+
+def test_reminders_fire_in_due_order(store):
+    recorder = Recorder()
+    scheduler = ReminderScheduler(store, recorder, workers=1)
+    scheduler.start()
+    now = time.time()
+    # Added latest first, so the heap (not insertion order) decides
+    ids = [scheduler.add(f"r{i}", _at(now + 0.3 - 0.1 * i), "Once", ["SMS"])["id"] for i in range(3)]
+
+    assert recorder.wait_for(3) == list(reversed(ids))
+    assert store.upcoming() == []
+
+
+def test_restart_recovers_due_and_future_reminders(store, tmp_path):
+    now = time.time()
+    missed = store.add("missed while down", _at(now - 60), "Once", ["SMS"])
+    soon = store.add("soon", _at(now + 0.2), "Once", ["WhatsApp"])
+    later = store.add("tomorrow", _at(now + DAY), "Once", ["SMS"])
+
+    # A fresh process: new store connection, new scheduler
+    recorder = Recorder()
+    ReminderScheduler(ReminderStore(str(tmp_path / "reminders.sqlite3")), recorder).start()
+
+    assert recorder.wait_for(2) == [missed["id"], soon["id"]]
+    assert [r["id"] for r in store.upcoming()] == [later["id"]]
+
+
+@pytest.mark.parametrize("frequency, late_by, period", [("Daily", 2.5 * DAY, DAY), ("Weekly", 8 * DAY, WEEK)])
+def test_repeating_reminder_is_rescheduled_once(store, frequency, late_by, period):
+    due = time.time() - late_by
+    reminder = store.add("take medicine", _at(due), frequency, ["SMS"])
+
+    recorder = Recorder()
+    ReminderScheduler(store, recorder).start()
+    recorder.wait_for(1)
+    time.sleep(0.1)
+
+    assert recorder.fired == [reminder["id"]]    # one alert, not one per missed occurrence
+    [rescheduled] = store.upcoming()
+    assert rescheduled["id"] == reminder["id"] and not rescheduled["triggered"]
+    missed = int(late_by // period) + 1
+    assert rescheduled["due"] == pytest.approx(due + missed * period)
+    assert rescheduled["due"] > time.time()
@@ -0,0 +1,53 @@
+"""The retriever must survive an index rebuild that is still in progress."""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from utils.retrieval import DEFAULT_CONTEXT, IndexBuilder, MedicalRetriever
+
+
+def _corpus(path, topics):
+    path.mkdir(exist_ok=True)
+    for topic in topics:
+        (path / f"{topic}.txt").write_text(f"{topic} symptoms include fever and headache. "
+                                           f"{topic} is treated with rest and fluids.", encoding="utf-8")
+
+
+def test_index_without_matching_offsets_is_not_used(tmp_path):
+    index_dir = tmp_path / "index"
+    _corpus(tmp_path / "corpus", ["dengue"])
+    IndexBuilder(str(index_dir)).build(str(tmp_path / "corpus"))
+    retriever = MedicalRetriever(str(index_dir))
+    assert retriever.search("dengue symptoms")
+
+    # Rebuild with more passages, then put the old offsets back as if the builder
+    # had replaced index.faiss but not offsets.npy yet
+    old_offsets = tmp_path / "old_offsets.npy"
+    shutil.copy(index_dir / "offsets.npy", old_offsets)
+    _corpus(tmp_path / "corpus", ["malaria", "typhoid", "cholera"])
+    IndexBuilder(str(index_dir)).build(str(tmp_path / "corpus"), append=True)
+    new_offsets = tmp_path / "new_offsets.npy"
+    shutil.copy(index_dir / "offsets.npy", new_offsets)
+    os.replace(old_offsets, index_dir / "offsets.npy")
+
+    assert retriever.search("typhoid symptoms", k=4)    # old index, old offsets: no IndexError
+
+    os.replace(new_offsets, index_dir / "offsets.npy")
+    results = retriever.search("typhoid symptoms", k=4)
+    assert len(results) == 4
+    assert len(retriever._offsets) == len(np.load(index_dir / "offsets.npy"))
+
+
+def test_context_for_falls_back_when_search_fails(tmp_path, monkeypatch):
+    retriever = MedicalRetriever(str(tmp_path))
+
+    def broken(query, k):
+        raise IndexError("index 7 is out of bounds")
+
+    monkeypatch.setattr(retriever, "search", broken)
+    assert retriever.context_for("dengue symptoms") == DEFAULT_CONTEXT
@@ -0,0 +1,58 @@
+"""Questions that look alike but need different answers must not share a cache entry."""
+
+import pytest
+
+from utils.embeddings import HashingEmbedder, content_words, key_terms
+
+NEGATIVE_PAIRS = [
+    ("What is the maximum safe daily dose of paracetamol for a child weighing 20 kg",
+     "What is the maximum safe daily dose of paracetamol for a child weighing 40 kg"),
+    ("What diet should a person with type 1 diabetes follow to keep sugar levels stable",
+     "What diet should a person with type 2 diabetes follow to keep sugar levels stable"),
+    ("Is it safe to take ibuprofen for a fever during pregnancy",
+     "Is it safe to take paracetamol for a fever during pregnancy"),
+    ("How much paracetamol can an adult take in a day",
+     "How much paracetamol can a child take in a day"),
+    ("Can I take 500 mg amoxicillin twice a day",
+     "Can I take 250 mg amoxicillin twice a day"),
+    ("my father has high blood pressure and takes amlodipine every morning, what diet should he follow",
+     "my father has low blood pressure and takes amlodipine every morning, what diet should he follow"),
+    ("what diet is recommended for a person with high cholesterol who also has diabetes and hypertension",
+     "what diet is recommended for a person with low cholesterol who also has diabetes and hypertension"),
+]
+
+POSITIVE_PAIRS = [
+    ("symptoms of dengue", "dengue symptoms?"),
+    ("paracetamol dose for a 20 kg child", "paracetamol dose for a 20kg child"),
+    ("What are the symptoms of dengue?", "what are symptoms of Dengue"),
+]
+
+
+def _same_question(first, second):
+    return key_terms(first) == key_terms(second) and content_words(first) == content_words(second)
+
+
+@pytest.mark.parametrize("first, second", NEGATIVE_PAIRS)
+def test_lexically_close_questions_are_told_apart(first, second):
+    assert not _same_question(first, second)
+
+
+@pytest.mark.parametrize("first, second", POSITIVE_PAIRS)
+def test_rephrasings_are_the_same_question(first, second):
+    assert _same_question(first, second)
+
+
+@pytest.mark.parametrize("first, second", NEGATIVE_PAIRS[:2] + NEGATIVE_PAIRS[-2:])
+def test_semantic_cache_misses_negative_pairs(tmp_path, first, second):
+    pytest.importorskip("faiss")
+    from utils.semantic_cache import SemanticCache
+
+    embedder = HashingEmbedder()
+    # Similar enough to pass the threshold on their own...
+    assert float(embedder.embed_query(first) @ embedder.embed_query(second)) >= 0.9
+
+    cache = SemanticCache(str(tmp_path), embedder=embedder, threshold=0.9)
+    cache.store(first, "English", "answer for the first question")
+    # ...but the key terms or content words differ, so the answer is not reused
+    assert cache.lookup(second, "English") is None
+    assert cache.lookup(first, "English") == "answer for the first question"
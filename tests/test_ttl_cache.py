@@ -0,0 +1,35 @@
+"""Concurrent get_or_compute callers must share one computation."""
+
+import threading
+import time
+
+from utils.ttl_cache import TTLCache
+
+
+def test_miss_racing_a_finished_compute_reuses_its_value():
+    cache = TTLCache()
+    calls = []
+    lookup_done = threading.Event()
+    original_get = cache.get
+
+    def slow_get(key, default=None):
+        value = original_get(key, default)
+        lookup_done.set()
+        time.sleep(0.2)    # the first caller finishes while this one sits between lookup and lock
+        return value
+
+    def compute():
+        calls.append(1)
+        return "answer"
+
+    results = []
+    late = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+    cache.get = slow_get
+    late.start()
+    lookup_done.wait()
+    cache.get = original_get
+    results.append(cache.get_or_compute("k", compute))
+    late.join()
+
+    assert results == ["answer", "answer"]
+    assert len(calls) == 1
@@ -0,0 +1,61 @@
+"""A bad TTS response must cost the answer its audio, never the answer itself."""
+
+import base64
+import io
+import wave
+
+import httpx
+import pytest
+
+from utils import registry, tts
+from utils.disk_cache import DiskLRU
+
+
+def _wav():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(8000)
+        clip.writeframes(b"\0\0" * 80)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def sarvam(monkeypatch, tmp_path):
+    """Point synthesise at a fake Sarvam API answering with respond(request)."""
+    def install(respond):
+        client = httpx.Client(transport=httpx.MockTransport(respond))
+        monkeypatch.setattr(registry, "get_http_client", lambda: client)
+        monkeypatch.setattr(tts, "_get_cache", lambda: DiskLRU(str(tmp_path / "tts.sqlite3")))
+    return install
+
+
+@pytest.mark.parametrize("respond", [
+    lambda request: httpx.Response(200, text="<html>not json</html>"),
+    lambda request: httpx.Response(200, json={"error": "no audios"}),
+    lambda request: httpx.Response(200, json={"audios": []}),
+    lambda request: httpx.Response(200, json={"audios": ["%%% not base64 %%%"]}),
+    lambda request: httpx.Response(302, headers={"Location": "https://example.com"}),
+])
+def test_bad_responses_raise_tts_error(sarvam, respond):
+    sarvam(respond)
+    with pytest.raises(tts.TTSError):
+        tts.synthesise("Drink water.", "en-IN")
+
+
+def test_pipeline_skips_failed_segments(sarvam):
+    audio = base64.b64encode(_wav()).decode("ascii")
+    sarvam(lambda request: httpx.Response(200, json={"audios": [audio]} if b"Rest" in request.content else {}))
+
+    pipeline = tts.SpeechPipeline("en-IN")
+    pipeline.feed("Drink water. Rest well.")
+    pipeline.close()
+    clips = []
+    while pipeline.pending:
+        clip = pipeline.next_clip(block=True)
+        if clip is not None:
+            clips.append(clip)
+
+    assert clips == [_wav()]
+    assert len(pipeline.errors) == 1
@@ -0,0 +1 @@
+"""Shared helpers used by ClickClinic's Streamlit pages."""
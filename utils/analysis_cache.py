@@ -0,0 +1,159 @@
+"""Cache of Gemini image analyses, keyed by image content.
+
+An analysis is stored under the SHA-256 of the image bytes plus the page's
+prompt version (bump it whenever the prompt changes) and any extra user input.
+On pages listed in NEAR_MATCH_PAGES (food photos only), each stored image
+also gets a 256-bit difference hash (dHash), so a new photo of the same meal,
+which never has identical bytes, is still answered from the cache when its
+hash is within a few bits. Labels and prescriptions only ever get exact hits:
+two documents on the same template hash a few bits apart however different
+their drugs, doses or ingredients are.
+Analyses live in a size-bounded DiskLRU, with the hashes in a table of the
+same SQLite file that loses its rows in the transaction that evicts their
+analyses. Hits and misses are counted per page.
+"""
+
+import hashlib
+import io
+import threading
+
+from PIL import Image
+
+from utils import registry
+from utils.config import cache_path, env_int
+from utils.disk_cache import DiskLRU
+
+HASH_SIZE = 16    # dHash of a 17x16 thumbnail: 256 bits
+# Pages where a near-identical image may be answered with another image's analysis
+NEAR_MATCH_PAGES = frozenset({"calorie_counter"})
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """Perceptual difference hash of a PIL image (or image bytes), as an int."""
+    if not isinstance(image, Image.Image):
+        image = Image.open(io.BytesIO(image))
+    pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = value << 1 | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class AnalysisCache:
+    def __init__(self, results, max_distance=10, near_match_pages=NEAR_MATCH_PAGES):
+        self.results = results
+        self.max_distance = max_distance
+        self.near_match_pages = near_match_pages
+        self._lock = threading.Lock()
+        with results.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS image_hashes (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    hash TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS image_hashes_namespace ON image_hashes (namespace)")
+            # Rows left behind by evictions before hashes were pruned with their analyses
+            conn.execute("DELETE FROM image_hashes WHERE key NOT IN (SELECT key FROM entries)")
+        results.on_evict = self._forget
+        self.counters = {}
+
+    @staticmethod
+    def _forget(conn, keys):
+        conn.executemany("DELETE FROM image_hashes WHERE key = ?", [(key,) for key in keys])
+
+    @staticmethod
+    def _namespace(page, prompt_version, extra):
+        return f"{page}|{prompt_version}|{extra.strip().lower()}"
+
+    def _key(self, image_bytes, namespace):
+        return hashlib.sha256(namespace.encode("utf-8") + b"\0" + image_bytes).hexdigest()
+
+    def _count(self, page, outcome):
+        with self._lock:
+            counters = self.counters.setdefault(page, {"hits": 0, "near_hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def _nearest(self, namespace, value):
+        with self.results.transaction() as conn:
+            rows = conn.execute("SELECT key, hash FROM image_hashes WHERE namespace = ?", (namespace,)).fetchall()
+        best = None
+        for key, stored in rows:
+            distance = bin(int(stored, 16) ^ value).count("1")
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (key, distance)
+        return best
+
+    def lookup(self, page, image_bytes, prompt_version, extra=""):
+        """Cached analysis of this image for page (or of a near-identical one, on near-match pages), or None."""
+        namespace = self._namespace(page, prompt_version, extra)
+        cached = self.results.get(self._key(image_bytes, namespace))
+        if cached is not None:
+            self._count(page, "hits")
+            return cached.decode("utf-8")
+        if page not in self.near_match_pages:
+            self._count(page, "misses")
+            return None
+
+        match = self._nearest(namespace, dhash(image_bytes))
+        if match is not None:
+            cached = self.results.get(match[0])
+            if cached is not None:
+                self._count(page, "near_hits")
+                return cached.decode("utf-8")
+            # Evicted by another process since the hashes were read
+            with self.results.transaction() as conn:
+                self._forget(conn, [match[0]])
+
+        self._count(page, "misses")
+        return None
+
+    def store(self, page, image_bytes, prompt_version, analysis, extra=""):
+        namespace = self._namespace(page, prompt_version, extra)
+        key = self._key(image_bytes, namespace)
+        self.results.set(key, analysis.encode("utf-8"))
+        if page not in self.near_match_pages:
+            return
+        value = format(dhash(image_bytes), "x")
+        with self.results.transaction() as conn:
+            # Skipped if another thread's set() has already evicted the analysis
+            conn.execute("INSERT OR REPLACE INTO image_hashes (key, namespace, hash) "
+                         "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM entries WHERE key = ?)",
+                         (key, namespace, value, key))
+
+    def analyse(self, page, image_bytes, prompt_version, compute, extra=""):
+        """(analysis, from_cache): the cached analysis if there is one, else compute() stored for next time."""
+        if not image_bytes:
+            return compute(), False
+        analysis = self.lookup(page, image_bytes, prompt_version, extra)
+        if analysis is not None:
+            return analysis, True
+        analysis = compute()
+        if analysis:
+            self.store(page, image_bytes, prompt_version, analysis, extra)
+        return analysis, False
+
+    def stats(self, page):
+        with self._lock:
+            counters = dict(self.counters.get(page, {"hits": 0, "near_hits": 0, "misses": 0}))
+        lookups = sum(counters.values())
+        counters["hit_rate"] = (counters["hits"] + counters["near_hits"]) / lookups if lookups else 0.0
+        return counters
+
+    def summary(self, page):
+        stats = self.stats(page)
+        return (f"Analysis cache: {stats['hits']} exact, {stats['near_hits']} similar, "
+                f"{stats['misses']} new ({stats['hit_rate']:.0%} reused)")
+
+
+def get_analysis_cache():
+    """Process-wide image analysis cache under .cache/, sized by ANALYSIS_CACHE_MB."""
+    def build():
+        results = DiskLRU(cache_path("image_analyses.sqlite3"),
+                          max_bytes=env_int("ANALYSIS_CACHE_MB", 50) * 1024 * 1024)
+        return AnalysisCache(results, max_distance=env_int("ANALYSIS_CACHE_MAX_DISTANCE", 10))
+
+    return registry.get_shared("analysis_cache", build)
@@ -0,0 +1,22 @@
+"""Process-wide background services, started by whichever page is served first.
+
+Streamlit only runs a script when a session opens a page, and a user can land
+on any page directly, so every page calls ``start()`` at the top. Only the
+first call does anything: it starts the reminder scheduler and opens the
+provider connections (registry.warm_up).
+"""
+
+from dotenv import load_dotenv
+
+from utils import registry
+from utils.reminder_alerts import start_reminders
+
+
+def start():
+    def build():
+        load_dotenv()    # not every page loads .env before calling start()
+        start_reminders()
+        registry.warm_up()
+        return True
+
+    registry.get_shared("background_services", build)
@@ -0,0 +1,168 @@
+"""Compact, process-wide index over pages/cities.json for FindDoctor.
+
+The JSON (4k+ cities with coordinates stored as strings) is parsed once per
+process into parallel arrays: names, state codes and float32 coordinates.
+On top of those sit a state -> cities map, an exact (state code, name) lookup
+(names alone are ambiguous: ~100 of them occur in more than one state) and a
+sorted prefix index so a city can be found by typing its name, plus a grid
+spatial index for nearest-city and radius queries. The arrays are
+also saved as a binary .npz next to the cache, reused for as long as the JSON
+file is unchanged.
+"""
+
+import bisect
+import json
+import os
+
+import numpy as np
+
+from utils import registry
+from utils.config import cache_path
+from utils.geo import GridIndex
+
+CITIES_FILE = os.path.join("pages", "cities.json")
+
+STATE_CODE_MAPPING = {
+    "AP": "Andhra Pradesh",
+    "AR": "Arunachal Pradesh",
+    "AS": "Assam",
+    "BR": "Bihar",
+    "CT": "Chhattisgarh",
+    "GA": "Goa",
+    "GJ": "Gujarat",
+    "HR": "Haryana",
+    "HP": "Himachal Pradesh",
+    "JK": "Jammu and Kashmir",
+    "JH": "Jharkhand",
+    "KA": "Karnataka",
+    "KL": "Kerala",
+    "MP": "Madhya Pradesh",
+    "MH": "Maharashtra",
+    "MN": "Manipur",
+    "ML": "Meghalaya",
+    "MZ": "Mizoram",
+    "NL": "Nagaland",
+    "OR": "Odisha",
+    "PB": "Punjab",
+    "RJ": "Rajasthan",
+    "SK": "Sikkim",
+    "TN": "Tamil Nadu",
+    "TG": "Telangana",
+    "TR": "Tripura",
+    "UP": "Uttar Pradesh",
+    "UT": "Uttarakhand",
+    "WB": "West Bengal",
+    "AN": "Andaman and Nicobar Islands",
+    "CH": "Chandigarh",
+    "DH": "Dadra and Nagar Haveli and Daman and Diu",
+    "DL": "Delhi",
+    "LD": "Lakshadweep",
+    "PY": "Puducherry",
+    "LA": "Ladakh"
+}
+
+STATE_NAME_TO_CODE = {name: code for code, name in STATE_CODE_MAPPING.items()}
+
+
+def state_name(code):
+    return STATE_CODE_MAPPING.get(code, code)
+
+
+class CityIndex:
+    def __init__(self, names, state_codes, latitudes, longitudes):
+        self.names = list(names)
+        self.state_codes = list(state_codes)
+        self.latitudes = np.asarray(latitudes, dtype=np.float32)
+        self.longitudes = np.asarray(longitudes, dtype=np.float32)
+
+        self.by_state = {}
+        self.by_key = {}
+        for i, (name, code) in enumerate(zip(self.names, self.state_codes)):
+            self.by_state.setdefault(code, []).append(i)
+            self.by_key[(code, name.lower())] = i
+        for ids in self.by_state.values():
+            ids.sort(key=lambda i: self.names[i])
+
+        prefix_entries = sorted((name.lower(), i) for i, name in enumerate(self.names))
+        self._prefix_keys = [key for key, _ in prefix_entries]
+        self._prefix_ids = [i for _, i in prefix_entries]
+
+        self.states = sorted({state_name(code) for code in self.by_state})
+        self.grid = GridIndex(self.latitudes, self.longitudes)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_json(cls, path=CITIES_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            city_data = json.load(f)
+        return cls(
+            [city["name"] for city in city_data],
+            [city["stateCode"] for city in city_data],
+            [float(city["latitude"]) for city in city_data],
+            [float(city["longitude"]) for city in city_data],
+        )
+
+    @classmethod
+    def load(cls, path=CITIES_FILE):
+        """Load from the binary cache if it matches path, otherwise parse the JSON and refresh the cache."""
+        stat = os.stat(path)
+        signature = np.asarray([stat.st_size, int(stat.st_mtime)], dtype=np.int64)
+        binary = cache_path("cities.npz")
+        if os.path.exists(binary):
+            try:
+                with np.load(binary) as data:
+                    if np.array_equal(data["signature"], signature):
+                        return cls(data["names"].tolist(), data["state_codes"].tolist(),
+                                   data["latitudes"], data["longitudes"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Rebuilding city index: {e}")
+
+        index = cls.from_json(path)
+        np.savez(binary, signature=signature, names=np.asarray(index.names),
+                 state_codes=np.asarray(index.state_codes),
+                 latitudes=index.latitudes, longitudes=index.longitudes)
+        return index
+
+    def cities_in(self, state):
+        """City ids in a state (given by name or code), sorted by name."""
+        return self.by_state.get(STATE_NAME_TO_CODE.get(state, state), [])
+
+    def lookup(self, state, name):
+        """City id for a (state name or code, city name) pair, or None."""
+        return self.by_key.get((STATE_NAME_TO_CODE.get(state, state), name.lower()))
+
+    def search(self, prefix, limit=20):
+        """Ids of cities whose name starts with prefix (case-insensitive), alphabetically."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._prefix_keys, prefix)
+        ids = []
+        for pos in range(start, len(self._prefix_keys)):
+            if len(ids) >= limit or not self._prefix_keys[pos].startswith(prefix):
+                break
+            ids.append(self._prefix_ids[pos])
+        return ids
+
+    def nearest(self, lat, lon, k=1):
+        """[(city id, distance in metres)] of the k cities closest to (lat, lon)."""
+        ids, distances = self.grid.nearest(lat, lon, k)
+        return list(zip(ids.tolist(), distances.tolist()))
+
+    def within(self, lat, lon, radius_m):
+        """[(city id, distance in metres)] of cities within radius_m of (lat, lon), nearest first."""
+        ids, distances = self.grid.within(lat, lon, radius_m)
+        return list(zip(ids.tolist(), distances.tolist()))
+
+    def label(self, i):
+        return f"{self.names[i]}, {state_name(self.state_codes[i])}"
+
+    def coordinates(self, i):
+        return float(self.latitudes[i]), float(self.longitudes[i])
+
+
+def get_city_index():
+    """Process-wide city index."""
+    return registry.get_shared("city_index", CityIndex.load)
@@ -0,0 +1,34 @@
+"""Locations and tunables shared by the helpers in this package."""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Everything the app persists between restarts lives under this directory
+CACHE_DIR = os.getenv("CLICKCLINIC_CACHE_DIR", ".cache")
+
+
+def cache_path(*parts):
+    """Path under CACHE_DIR, creating its parent directory if needed."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def cache_dir(*parts):
+    """Directory under CACHE_DIR, created if needed."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
@@ -0,0 +1,85 @@
+"""Size-bounded, least-recently-used byte store on disk.
+
+Values are opaque bytes (an analysis as UTF-8, a WAV clip, ...) kept in one
+SQLite file, so several threads and processes can share it. Once the stored
+values exceed max_bytes, the least recently read ones are deleted, and
+on_evict(conn, keys) is called in the same transaction so callers can drop
+anything they keep alongside those keys.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class DiskLRU:
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, on_evict=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @contextmanager
+    def transaction(self):
+        """The store's connection, under its lock and inside one transaction, for tables kept next to it."""
+        with self._lock, self._conn:
+            yield self._conn
+
+    def get(self, key):
+        """Stored bytes for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return bytes(row[0])
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def set(self, key, value):
+        """Store value under key, then evict least recently used entries down to max_bytes."""
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), time.time()),
+            )
+            self._total += len(value) - (old[0] if old else 0)
+
+            evicted_keys = []
+            while self._total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM entries WHERE key != ? ORDER BY accessed LIMIT 32", (key,)
+                ).fetchall()
+                if not rows:
+                    break
+                for evicted, size in rows:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (evicted,))
+                    evicted_keys.append(evicted)
+                    self._total -= size
+                    if self._total <= self.max_bytes:
+                        break
+            if evicted_keys and self.on_evict is not None:
+                self.on_evict(self._conn, evicted_keys)
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {"entries": count, "bytes": self._total, "max_bytes": self.max_bytes}
@@ -0,0 +1,110 @@
+"""Map-reduce analysis of long documents for PrescriptionReader.
+
+Pages come from utils.pdf.extract_pdf_content: text pages and scanned pages
+(as images) can be mixed freely. A document that fits in CHUNK_TOKENS goes
+to the model in one call, as before. A longer one is cut into chunks of whole
+pages (text pages that are too long on their own are split at paragraph, then
+line, boundaries). Every chunk is summarised concurrently with MAP_PROMPT,
+and a final call merges those notes into the usual report. Wall time then
+follows the slowest chunk instead of the length of the document, and no call
+exceeds the context window.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.config import env_int
+from utils.text import CHARS_PER_TOKEN, estimate_tokens
+
+CHUNK_TOKENS = env_int("PDF_CHUNK_TOKENS", 6000)
+WORKERS = env_int("PDF_ANALYSIS_WORKERS", 4)
+IMAGE_TOKENS = 258    # what Gemini charges for one image
+
+MAP_PROMPT = """
+You are reading one part of a longer medical document. List every fact in this part
+that belongs in a medical summary, without interpreting it:
+- Doctor, patient (name, age, gender), dates
+- Medications with dosages and instructions
+- Test names with results, units and reference ranges
+- Diagnoses, observations and follow-up instructions
+Write "None" if this part has nothing relevant. Be brief.
+"""
+
+REDUCE_NOTE = """
+The document was too long to read at once, so below are notes taken from each part
+of it in order (Part 1, Part 2, ...). Use them as the document.
+"""
+
+
+def _split_long(text, token_budget):
+    """Pieces of text under token_budget, cut at paragraph, then line, then character boundaries."""
+    if estimate_tokens(text) <= token_budget:
+        return [text]
+    for separator in (r"\n\s*\n", r"\n"):
+        parts = [p for p in re.split(separator, text) if p.strip()]
+        if len(parts) > 1:
+            pieces = [(estimate_tokens(part), [part]) for part in parts]
+            return ["\n\n".join(chunk) for chunk in _group(pieces, token_budget, split=True)]
+    size = token_budget * CHARS_PER_TOKEN
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _group(pieces, token_budget, split=False):
+    """Consecutive (tokens, parts) pieces packed into lists of parts under token_budget."""
+    chunks, current, used = [], [], 0
+    for tokens, parts in pieces:
+        if current and used + tokens > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        if split and tokens > token_budget:
+            chunks.extend([text] for text in _split_long(parts[0], token_budget))
+            continue
+        current.extend(parts)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _page_pieces(page, token_budget):
+    if "image" in page:
+        return [(IMAGE_TOKENS, [f"Page {page['number']} (scanned):", page["image"]])]
+    if not page["text"].strip():
+        return []
+    return [(estimate_tokens(text), [f"Page {page['number']}:\n{text}"])
+            for text in _split_long(page["text"], token_budget)]
+
+
+def chunk_pages(pages, token_budget=CHUNK_TOKENS):
+    """Model inputs (lists of text and image parts) of at most token_budget tokens each, in page order."""
+    return _group([piece for page in pages for piece in _page_pieces(page, token_budget)], token_budget)
+
+
+def map_reduce(pages, report_prompt, generate, token_budget=CHUNK_TOKENS, workers=WORKERS, on_progress=None):
+    """Report for a document given as extract_pdf_content pages.
+
+    generate(parts, prompt) makes one model call on a list of text and image
+    parts. on_progress(done, total) is called from the calling thread after
+    every finished chunk and once more when the report is done.
+    """
+    chunks = chunk_pages(pages, token_budget)
+    if len(chunks) <= 1:
+        report = generate(chunks[0] if chunks else [], report_prompt)
+        if on_progress:
+            on_progress(1, 1)
+        return report
+
+    total = len(chunks) + 1    # plus the reduce step
+    notes = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-map") as executor:
+        futures = {executor.submit(generate, chunk, MAP_PROMPT): i for i, chunk in enumerate(chunks)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            notes[futures[future]] = future.result() or ""
+            if on_progress:
+                on_progress(done, total)
+
+    merged = "\n\n".join(f"Part {i}:\n{note}" for i, note in enumerate(notes, start=1))
+    report = generate([merged], REDUCE_NOTE + report_prompt)
+    if on_progress:
+        on_progress(total, total)
+    return report
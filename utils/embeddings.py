@@ -0,0 +1,128 @@
+"""Local text embeddings for similarity lookups.
+
+The hashing embedder needs no model download and no network call, so it is
+cheap enough to run on every chat turn. It captures lexical overlap (words and
+character trigrams), which is what near-duplicate questions such as
+"symptoms of dengue" / "dengue symptoms?" share. Anything exposing the same
+``embed`` / ``embed_query`` methods can be used in its place.
+
+Lexical similarity cannot tell "dose for a 20 kg child" from "dose for a
+40 kg child", or "high blood pressure" from "low blood pressure", so callers
+only treat two questions as the same when both of these match exactly:
+``key_terms`` (numbers with their units, negations and known medical terms)
+and ``content_words`` (every word that is not a stopword, lightly stemmed, so
+word order, punctuation and plurals still don't matter).
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[\wऀ-ॿ]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "can", "do", "does", "for", "how", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "the", "to", "what", "when", "which", "with",
+}
+
+
+# A number and its unit, e.g. "20 kg", "500mg", "2.5 ml", "type 2"
+NUMBER_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(%|[a-zऀ-ॿ]+)?")
+
+UNITS = {
+    "mg", "g", "kg", "mcg", "ug", "ml", "l", "iu", "units", "unit", "mmol", "mmhg", "bpm",
+    "cm", "mm", "m", "ft", "lb", "lbs", "years", "year", "yr", "yrs", "months", "month",
+    "weeks", "week", "days", "day", "hours", "hour", "hrs", "hr", "times", "tablets",
+    "tablet", "drops", "%", "c", "f",
+}
+
+NEGATIONS = {"no", "not", "without", "never", "nahi", "नहीं", "बिना"}
+
+# Words that change the meaning (and the right answer) of an otherwise similar question
+MEDICAL_TERMS = {
+    # who
+    "child", "children", "kid", "kids", "baby", "babies", "infant", "infants", "newborn",
+    "toddler", "teen", "teenager", "adult", "adults", "elderly", "pregnant", "pregnancy",
+    "breastfeeding", "lactating", "male", "female", "men", "women", "man", "woman",
+    # conditions
+    "diabetes", "diabetic", "hypertension", "hypotension", "asthma", "cancer", "covid",
+    "dengue", "malaria", "typhoid", "tuberculosis", "tb", "hiv", "hepatitis", "jaundice",
+    "thyroid", "hypothyroidism", "hyperthyroidism", "anemia", "anaemia", "migraine",
+    "arthritis", "kidney", "renal", "liver", "heart", "cardiac", "stroke", "epilepsy",
+    "allergy", "allergic", "pcos", "pcod", "obesity", "fever", "cough", "cold", "flu",
+    "acute", "chronic", "type",
+    # medicines
+    "paracetamol", "acetaminophen", "ibuprofen", "aspirin", "diclofenac", "amoxicillin",
+    "azithromycin", "metformin", "insulin", "cetirizine", "omeprazole", "pantoprazole",
+    "dolo", "crocin", "antibiotic", "antibiotics", "steroid", "steroids", "vaccine",
+    # how
+    "oral", "injection", "iv", "topical", "overdose", "maximum", "minimum", "daily",
+    "weekly", "before", "after", "morning", "night",
+}
+
+
+# Filler that never changes what a question asks; negations are deliberately not here
+QUESTION_STOPWORDS = STOPWORDS | {
+    "about", "am", "any", "be", "been", "by", "could", "from", "get", "give", "has", "have",
+    "he", "her", "his", "if", "im", "know", "me", "much", "many", "please", "she", "should",
+    "so", "some", "tell", "that", "their", "there", "they", "this", "was", "we", "were",
+    "will", "would", "you", "your",
+}
+
+
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def content_words(text):
+    """Lightly stemmed words of text that are not stopwords, numbers or units, as a frozenset."""
+    return frozenset(_stem(w) for w in TOKEN_PATTERN.findall(text.lower().replace("'", ""))
+                     if w not in QUESTION_STOPWORDS and w not in UNITS and not w[0].isdigit())
+
+
+def key_terms(text):
+    """Numbers with units, negations and medical terms of text, as a frozenset."""
+    text = text.lower()
+    terms = set()
+    for number, unit in NUMBER_PATTERN.findall(text):
+        value = float(number.replace(",", "."))
+        unit = unit if unit in UNITS or unit == "%" else ""
+        terms.add(f"{value:g}{unit}")
+    terms.update(w for w in TOKEN_PATTERN.findall(text) if w in NEGATIONS or w in MEDICAL_TERMS)
+    return frozenset(terms)
+
+
+class HashingEmbedder:
+    """Hashed bag of words and character trigrams, L2-normalised."""
+
+    def __init__(self, dim=512, trigram_weight=0.5):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+
+    def _features(self, text):
+        words = [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+        for word in words:
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], self.trigram_weight
+
+    def embed_query(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            # crc32 is stable across processes, unlike hash(), so persisted vectors stay valid
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([self.embed_query(text) for text in texts])
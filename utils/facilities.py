@@ -0,0 +1,104 @@
+"""Local facility dataset as a Places provider for FindDoctor.
+
+The dataset is a CSV or Parquet file with one facility per row and the
+columns ``name``, ``address``, ``latitude``, ``longitude`` and ``types``
+(service types separated by ``;`` or ``|``, e.g. ``hospital;pharmacy``).
+It is loaded once into NumPy arrays. Radius queries scan only the grid cells
+around the centre (utils/geo.GridIndex) with one vectorised haversine call,
+and service types are matched through an inverted index, so a search takes
+well under a millisecond and needs no network.
+"""
+
+import csv
+import os
+import re
+
+import numpy as np
+
+from utils.geo import GridIndex
+from utils.places import PlacesProvider, normalise_service_type
+
+FACILITY_DATASET = os.path.join("data", "facilities.csv")
+
+_TYPE_SEPARATORS = re.compile(r"[;|]")
+
+
+def type_key(service_type):
+    """Normalised service type, singular: "Hospitals " -> "hospital", "Pharmacies" -> "pharmacy"."""
+    service_type = normalise_service_type(service_type)
+    if service_type.endswith("ies") and len(service_type) > 4:
+        return service_type[:-3] + "y"
+    # "diagnosis", "virus" and "class" are already singular
+    if service_type.endswith("s") and not service_type.endswith(("ss", "is", "us")):
+        return service_type[:-1]
+    return service_type
+
+
+def _read_rows(path):
+    if path.endswith(".parquet"):
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("Reading a Parquet facility dataset needs pandas and pyarrow") from e
+        return pd.read_parquet(path).to_dict("records")
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class FacilityProvider(PlacesProvider):
+    cacheable = False
+
+    def __init__(self, names, addresses, latitudes, longitudes, types, limit=50):
+        self.names = list(names)
+        self.addresses = list(addresses)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.types = [list(t) for t in types]
+        self.limit = limit
+
+        by_type = {}
+        for i, facility_types in enumerate(self.types):
+            for t in facility_types:
+                by_type.setdefault(type_key(t), []).append(i)
+        self.by_type = {t: np.unique(np.asarray(ids, dtype=np.int64)) for t, ids in by_type.items()}
+        self.grid = GridIndex(self.latitudes, self.longitudes, cell_deg=0.1)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def load(cls, path=FACILITY_DATASET):
+        names, addresses, latitudes, longitudes, types = [], [], [], [], []
+        for row in _read_rows(path):
+            try:
+                lat, lon = float(row["latitude"]), float(row["longitude"])
+            except (TypeError, ValueError):
+                continue
+            names.append(str(row.get("name") or "").strip())
+            addresses.append(str(row.get("address") or "").strip())
+            latitudes.append(lat)
+            longitudes.append(lon)
+            types.append([t.strip() for t in _TYPE_SEPARATORS.split(str(row.get("types") or "")) if t.strip()])
+        print(f"Loaded {len(names)} facilities from {path}")
+        return cls(names, addresses, latitudes, longitudes, types)
+
+    def nearby(self, lat, lon, service_type, radius_m):
+        """Facilities of service_type within radius_m of (lat, lon), nearest first."""
+        ids, distances = self.grid.within(lat, lon, radius_m)
+        if service_type:
+            matching = self.by_type.get(type_key(service_type))
+            if matching is None:
+                return []
+            keep = np.isin(ids, matching, assume_unique=True)
+            ids, distances = ids[keep], distances[keep]
+
+        return [self._prediction(i, d) for i, d in zip(ids[:self.limit].tolist(), distances[:self.limit].tolist())]
+
+    def _prediction(self, i, distance):
+        return {
+            "place_id": f"local:{i}",
+            "structured_formatting": {"main_text": self.names[i], "secondary_text": self.addresses[i]},
+            "types": self.types[i],
+            "geometry": {"location": {"lat": float(self.latitudes[i]), "lng": float(self.longitudes[i])}},
+            "distance_meters": round(distance),
+        }
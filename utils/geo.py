@@ -0,0 +1,139 @@
+"""Geographic helpers: vectorised haversine distances and a grid spatial index."""
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres; any argument may be a NumPy array."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """Points bucketed into cell_deg x cell_deg cells, for nearest-k and radius queries.
+
+    Only the cells around the query point are scanned, and the exact distance
+    is computed for their points in one vectorised haversine call.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_deg=0.5):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.cell_deg = cell_deg
+
+        rows = np.floor(self.latitudes / cell_deg).astype(np.int64)
+        cols = np.floor(self.longitudes / cell_deg).astype(np.int64)
+        cells = {}
+        for i, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            cells.setdefault(key, []).append(i)
+        self.cells = {key: np.asarray(ids, dtype=np.int64) for key, ids in cells.items()}
+        if len(self.latitudes):
+            self._row_range = (int(rows.min()), int(rows.max()))
+            self._col_range = (int(cols.min()), int(cols.max()))
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _gather(self, row_lo, row_hi, col_lo, col_hi):
+        chunks = [self.cells[(r, c)] for r in range(row_lo, row_hi + 1) for c in range(col_lo, col_hi + 1)
+                  if (r, c) in self.cells]
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+    def _ranked(self, lat, lon, ids):
+        distances = haversine_m(lat, lon, self.latitudes[ids], self.longitudes[ids])
+        order = np.argsort(distances, kind="stable")
+        return ids[order], distances[order]
+
+    def within(self, lat, lon, radius_m):
+        """(ids, distances) of points within radius_m of (lat, lon), nearest first."""
+        if not len(self.latitudes):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        dlat = radius_m / METERS_PER_DEGREE
+        dlon = dlat / max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        row_lo, col_lo = self._cell(lat - dlat, lon - dlon)
+        row_hi, col_hi = self._cell(lat + dlat, lon + dlon)
+        ids, distances = self._ranked(lat, lon, self._gather(row_lo, row_hi, col_lo, col_hi))
+        keep = distances <= radius_m
+        return ids[keep], distances[keep]
+
+    def nearest(self, lat, lon, k=1):
+        """(ids, distances) of the k points closest to (lat, lon), nearest first."""
+        if not len(self.latitudes):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        row, col = self._cell(lat, lon)
+        # Narrowest a cell can be, so a ring of r cells guarantees r * min_cell_m of coverage
+        min_cell_m = self.cell_deg * METERS_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + self.cell_deg, 89.9))), 1e-6)
+        max_ring = max(abs(row - self._row_range[0]), abs(row - self._row_range[1]),
+                       abs(col - self._col_range[0]), abs(col - self._col_range[1]))
+
+        ring = 0
+        while True:
+            ids = self._gather(row - ring, row + ring, col - ring, col + ring)
+            if len(ids) >= k or ring >= max_ring:
+                ids, distances = self._ranked(lat, lon, ids)
+                # Anything outside the scanned square is at least ring * min_cell_m away
+                if ring >= max_ring or distances[k - 1] <= ring * min_cell_m:
+                    return ids[:k], distances[:k]
+            ring += 1
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat, lon, precision=5):
+    """Standard geohash of (lat, lon); precision 5 cells are about 4.9 x 4.9 km."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, interval = (lon, lon_range) if even else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash):
+    """((min lat, max lat), (min lon, max lon)) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return tuple(lat_range), tuple(lon_range)
+
+
+def geohash_center(geohash):
+    """(lat, lon) of the centre of a geohash cell."""
+    (lat_min, lat_max), (lon_min, lon_max) = geohash_bounds(geohash)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+def geohash_half_diagonal_m(geohash):
+    """Farthest any point of a geohash cell can be from its centre, in metres."""
+    (lat_min, lat_max), (lon_min, lon_max) = geohash_bounds(geohash)
+    center_lat, center_lon = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    # The edge nearer the equator is the wider one
+    corner_lat = lat_min if abs(lat_min) < abs(lat_max) else lat_max
+    return float(haversine_m(center_lat, center_lon, corner_lat, lon_max))
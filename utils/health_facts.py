@@ -0,0 +1,149 @@
+"""Pool of pre-generated health facts for reminder messages.
+
+Reminders and confirmations take a fact from an in-memory deque in O(1)
+instead of waiting on Gemini. When the pool drops below a low-water mark a
+single background refill asks Gemini for a batch of new facts; facts already
+in the pool or recently served are discarded so users don't see repeats. The
+pool and the served history are kept on disk, and a short local list covers
+the time before the first batch arrives (or when Gemini is unavailable).
+"""
+
+import atexit
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from utils import registry
+from utils.config import cache_path, env_int
+
+FALLBACK_FACTS = [
+    "Stay hydrated and active for better health!",
+    "A 10-minute walk after meals can help keep blood sugar steady.",
+    "Adults need 7-9 hours of sleep a night; a regular bedtime makes it easier.",
+    "Washing your hands for 20 seconds is one of the simplest ways to avoid infections.",
+    "Half a plate of vegetables and fruit at each meal is an easy rule of thumb.",
+    "Taking the stairs a few times a day adds up to real cardio exercise.",
+    "Regular blood pressure checks catch problems long before symptoms appear.",
+    "Stretching for five minutes in the morning can ease stiffness and improve posture.",
+    "Cutting back on sugary drinks is one of the quickest ways to reduce added sugar.",
+    "Look away from your screen every 20 minutes to rest your eyes.",
+    "Deep, slow breathing for a minute can lower stress and heart rate.",
+    "Take your medicines at the same time each day so doses are never missed.",
+]
+
+# Seconds to wait after a failed refill before asking Gemini again
+RETRY_AFTER = 60
+
+PROMPT = (
+    "Generate {count} different short, interesting health facts or health tips that would be "
+    "motivational and informative. Keep each one concise (1-2 sentences). "
+    "Write one per line, without numbering or bullet points."
+)
+
+
+def _normalise(fact):
+    return " ".join(re.findall(r"\w+", fact.lower()))
+
+
+def generate_with_gemini(count):
+    """Ask Gemini for count facts in one call."""
+    model = registry.get_gemini_model('gemini-pro')
+    response = model.generate_content(PROMPT.format(count=count))
+    lines = (re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip() for line in response.text.splitlines())
+    return [line for line in lines if len(line) > 15]
+
+
+class HealthFactPool:
+    def __init__(self, path, generate_batch, low_water=10, batch_size=15, history=500):
+        self.path = path
+        self.generate_batch = generate_batch
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pool = deque()
+        self._served = deque(maxlen=history)
+        self._refilling = False
+        self._retry_at = 0.0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable health fact pool: {e}")
+            return
+        self._pool.extend(data.get("pool", []))
+        self._served.extend(data.get("served", []))
+
+    def save(self):
+        with self._lock:
+            data = {"pool": list(self._pool), "served": list(self._served)}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def take(self):
+        """A fact not served recently; never blocks on the generator."""
+        with self._lock:
+            fact = self._pool.popleft() if self._pool else None
+            if fact is not None:
+                self._served.append(_normalise(fact))
+        self.prime()
+        return fact if fact is not None else random.choice(FALLBACK_FACTS)
+
+    def prime(self):
+        """Start a background refill if the pool is below its low-water mark."""
+        with self._lock:
+            needs_refill = (len(self._pool) < self.low_water and not self._refilling
+                            and time.monotonic() >= self._retry_at)
+            if needs_refill:
+                self._refilling = True
+        if needs_refill:
+            threading.Thread(target=self._refill, name="health-facts", daemon=True).start()
+
+    def _refill(self):
+        try:
+            facts = self.generate_batch(self.batch_size)
+        except Exception as e:
+            print(f"Error generating health facts: {e}")
+            facts = []
+
+        with self._lock:
+            seen = set(self._served) | {_normalise(f) for f in self._pool}
+            for fact in facts:
+                key = _normalise(fact)
+                if key and key not in seen:
+                    seen.add(key)
+                    self._pool.append(fact)
+            self._refilling = False
+            if not facts:
+                self._retry_at = time.monotonic() + RETRY_AFTER
+        if facts:
+            self.save()
+
+    def __len__(self):
+        return len(self._pool)
+
+
+def get_fact_pool():
+    """Process-wide fact pool, primed in the background on first use."""
+    def build():
+        pool = HealthFactPool(
+            cache_path("health_facts.json"),
+            generate_with_gemini,
+            low_water=env_int("HEALTH_FACTS_LOW_WATER", 10),
+            batch_size=env_int("HEALTH_FACTS_BATCH", 15),
+        )
+        atexit.register(pool.save)
+        pool.prime()
+        return pool
+
+    return registry.get_shared("health_fact_pool", build)
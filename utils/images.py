@@ -0,0 +1,102 @@
+"""Image preprocessing before images are sent to Gemini.
+
+Phone photos are often 4-12 MB, and the upload is most of the wait on the
+vision pages. Each image is rotated according to its EXIF orientation,
+downscaled so its longest edge fits the task, and re-encoded as JPEG or WebP.
+Documents can also be turned to grayscale with normalised contrast, which
+keeps text legible at a fraction of the size.
+"""
+
+import io
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from utils.config import env_int
+
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "JPEG").upper()    # JPEG or WEBP
+IMAGE_QUALITY = env_int("IMAGE_QUALITY", 85)
+ENHANCE_DOCUMENTS = os.getenv("IMAGE_DOCUMENT_ENHANCE", "1") != "0"
+
+# Longest edge (pixels) each task still reads well at
+PROFILES = {
+    "food": {"max_edge": 1024, "document": False},
+    "label": {"max_edge": 1600, "document": False},
+    "document": {"max_edge": 2048, "document": True},
+}
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def _flatten(image):
+    """RGB (or L) copy of image, with any transparency composited onto white."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image if image.mode in ("RGB", "L") else image.convert("RGB")
+
+
+def prepare_image(source, task="food", mime_type=None):
+    """(image part for Gemini, size report) for an image given as bytes or a PIL image.
+
+    The report holds original_bytes, bytes, saved_bytes, width and height.
+    The original bytes are sent unchanged when re-encoding would not make
+    them smaller and the image needed no rotation, resizing or enhancement.
+    """
+    profile = PROFILES[task]
+    if isinstance(source, Image.Image):
+        original, image = None, source
+    else:
+        original, image = bytes(source), Image.open(io.BytesIO(source))
+
+    changed = image.getexif().get(0x0112, 1) != 1    # EXIF orientation
+    image = ImageOps.exif_transpose(image)
+
+    if max(image.size) > profile["max_edge"]:
+        image = image.copy()
+        image.thumbnail((profile["max_edge"], profile["max_edge"]), Image.LANCZOS)
+        changed = True
+
+    image = _flatten(image)
+    if profile["document"] and ENHANCE_DOCUMENTS:
+        image = ImageOps.autocontrast(image.convert("L"), cutoff=1)
+        changed = True
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=IMAGE_FORMAT, quality=IMAGE_QUALITY, optimize=True)
+    data = buffer.getvalue()
+    out_mime = MIME_TYPES[IMAGE_FORMAT]
+    if original is not None and not changed and len(original) <= len(data) and mime_type:
+        data, out_mime = original, mime_type
+
+    original_bytes = len(original) if original is not None else len(data)
+    report = {
+        "original_bytes": original_bytes,
+        "bytes": len(data),
+        "saved_bytes": original_bytes - len(data),
+        "width": image.width,
+        "height": image.height,
+    }
+    return {"mime_type": out_mime, "data": data}, report
+
+
+def describe_savings(report):
+    """One-line summary of a prepare_image report, for st.caption."""
+    saved = report["saved_bytes"]
+    if saved <= 0:
+        return f"Sent {report['bytes'] / 1024:.0f} KB ({report['width']}x{report['height']})"
+    percent = 100 * saved / report["original_bytes"]
+    return (f"Image optimised: {report['original_bytes'] / 1024:.0f} KB -> {report['bytes'] / 1024:.0f} KB "
+            f"({percent:.0f}% smaller, {report['width']}x{report['height']})")
+
+
+def sharpness(frame):
+    """Variance of the Laplacian of an HxWx3 (or HxW) frame; higher means sharper."""
+    frame = frame[::2, ::2]    # half resolution is plenty to rank frames
+    gray = frame.mean(axis=2, dtype=np.float32) if frame.ndim == 3 else frame.astype(np.float32)
+    laplacian = (4 * gray[1:-1, 1:-1] - gray[:-2, 1:-1] - gray[2:, 1:-1]
+                 - gray[1:-1, :-2] - gray[1:-1, 2:])
+    return float(laplacian.var())
@@ -0,0 +1,133 @@
+"""Lottie animation loader that never lets the CDN block a page render.
+
+Animations are looked up in a process-level memory cache, then in a disk
+cache under CACHE_DIR, and only then fetched (with a short timeout, several
+URLs at once). A stale copy is served immediately and refreshed in the
+background; when nothing is cached and the fetch fails, the bundled offline
+animation in assets/lottie is used instead.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from utils import registry
+from utils.config import cache_path, env_int
+
+ASSET_DIR = os.path.join("assets", "lottie")
+FALLBACK_FILE = os.path.join(ASSET_DIR, "fallback.json")
+
+TTL = env_int("LOTTIE_CACHE_TTL", 6 * 3600)
+FETCH_TIMEOUT = 3.0
+RETRY_AFTER = 60  # seconds before an unreachable URL is tried again
+
+_lock = threading.Lock()
+_memory = {}  # url -> (fetched_at, animation)
+_refreshing = set()
+_failed = {}  # url -> time of the last failed fetch
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lottie")
+
+
+def _disk_file(url):
+    return cache_path("lottie", hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _fallback():
+    bundled = _memory.get(FALLBACK_FILE)
+    if bundled is None:
+        bundled = (time.time(), _read_json(FALLBACK_FILE))
+        _memory[FALLBACK_FILE] = bundled
+    return bundled[1]
+
+
+def _fetch(url):
+    """Download url and update both caches; returns the animation or None."""
+    try:
+        r = registry.get_http_client().get(url, timeout=FETCH_TIMEOUT, follow_redirects=True)
+        if r.status_code != 200:
+            return None
+        animation = r.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"Could not fetch Lottie animation {url}: {e}")
+        return None
+
+    path = _disk_file(url)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(animation, f)
+    os.replace(tmp, path)
+    with _lock:
+        _memory[url] = (time.time(), animation)
+    return animation
+
+
+def _refresh_in_background(url):
+    with _lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+
+    def run():
+        try:
+            _fetch(url)
+        finally:
+            with _lock:
+                _refreshing.discard(url)
+
+    _executor.submit(run)
+
+
+def _cached(url):
+    """(fetched_at, animation) from memory or disk, or None."""
+    with _lock:
+        entry = _memory.get(url)
+    if entry is not None:
+        return entry
+
+    path = _disk_file(url)
+    animation = _read_json(path) if os.path.exists(path) else None
+    if animation is None:
+        return None
+    entry = (os.path.getmtime(path), animation)
+    with _lock:
+        _memory[url] = entry
+    return entry
+
+
+def load_lottie(url):
+    """Animation JSON for url; falls back to the bundled animation rather than blocking."""
+    entry = _cached(url)
+    if entry is not None:
+        fetched_at, animation = entry
+        if time.time() - fetched_at > TTL:
+            _refresh_in_background(url)
+        return animation
+
+    with _lock:
+        failed_at = _failed.get(url)
+    if failed_at is not None and time.time() - failed_at < RETRY_AFTER:
+        return _fallback()
+    animation = _fetch(url)
+    if animation is None:
+        with _lock:
+            _failed[url] = time.time()
+        return _fallback()
+    return animation
+
+
+def load_lotties(urls):
+    """Load several animations concurrently; returns them in the order of urls."""
+    return list(_executor.map(load_lottie, urls))
@@ -0,0 +1,197 @@
+"""Asynchronous WhatsApp/SMS delivery through Twilio.
+
+Messages are put on a bounded per-channel queue and sent by a small pool of
+worker threads per channel, all sharing one Twilio client (and so one pooled
+HTTP session). Each channel has its own token-bucket rate limit matching
+Twilio's throughput limits, so slow SMS sends never hold up WhatsApp ones;
+failed sends that are worth retrying (429, 5xx, network errors) are
+retried with exponential backoff, and delivery counters are kept for display.
+
+Setting TWILIO_API_BASE_URL points the client at another host, e.g. the fake
+endpoint in scripts/fake_twilio.py, so the whole path can be exercised locally.
+"""
+
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from utils import registry
+from utils.config import env_float, env_int
+
+
+class _BaseUrlHttpClient(TwilioHttpClient):
+    """Twilio HTTP client that sends every request to base_url instead of *.twilio.com."""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        url = re.sub(r"^https?://[^/]+", self.base_url, url)
+        return super().request(method, url, *args, **kwargs)
+
+
+def build_twilio_client(account_sid, auth_token):
+    base_url = os.getenv("TWILIO_API_BASE_URL")
+    if base_url:
+        http_client = _BaseUrlHttpClient(base_url, pool_connections=True, timeout=15)
+    else:
+        http_client = TwilioHttpClient(pool_connections=True, timeout=15)
+    return Client(account_sid, auth_token, http_client=http_client)
+
+
+class RateLimiter:
+    """Token bucket: at most rate sends per second on average, bursts of up to burst."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _is_retryable(error):
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    # Connection resets, timeouts and the like (requests' exceptions derive from IOError)
+    return isinstance(error, OSError)
+
+
+class NotificationDispatcher:
+    def __init__(self, client_factory, senders, rates, workers=2, queue_size=1000, max_attempts=5, base_delay=1.0):
+        """senders maps a channel name to its (from, to) numbers; rates maps it to messages per second.
+
+        The client is built by client_factory on the first send, so missing
+        credentials surface as failed deliveries rather than a page error.
+        """
+        self.client_factory = client_factory
+        self._client = None
+        self.senders = senders
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self._limiters = {channel: RateLimiter(rates.get(channel, 1.0)) for channel in senders}
+        self._queues = {channel: queue.Queue(maxsize=queue_size) for channel in senders}
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._latency_total = 0.0
+        for channel in senders:
+            for i in range(workers):
+                threading.Thread(target=self._work, args=(channel,), name=f"notify-{channel}-{i}",
+                                 daemon=True).start()
+
+    def submit(self, channel, body):
+        """Queue a message for delivery; returns False if the queue is full and it was dropped."""
+        if channel not in self.senders:
+            raise ValueError(f"Unknown notification channel: {channel}")
+        try:
+            self._queues[channel].put_nowait({"channel": channel, "body": body, "attempt": 1, "queued": time.time()})
+        except queue.Full:
+            self._count("dropped", channel)
+            return False
+        self._count("queued", channel)
+        return True
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self.client_factory()
+            return self._client
+
+    def _count(self, event, channel):
+        with self._lock:
+            self._counts[event] += 1
+            self._counts[f"{channel}.{event}"] += 1
+
+    def _work(self, channel):
+        channel_queue = self._queues[channel]
+        while True:
+            item = channel_queue.get()
+            try:
+                self._send(item)
+            finally:
+                channel_queue.task_done()
+
+    def _send(self, item):
+        channel = item["channel"]
+        from_, to = self.senders[channel]
+        self._limiters[channel].acquire()
+        try:
+            self._get_client().messages.create(body=item["body"], from_=from_, to=to)
+        except Exception as e:
+            if _is_retryable(e) and item["attempt"] < self.max_attempts:
+                delay = self.base_delay * 2 ** (item["attempt"] - 1) * random.uniform(0.5, 1.5)
+                item["attempt"] += 1
+                self._count("retried", channel)
+                print(f"{channel} send failed ({e}); retrying in {delay:.1f}s")
+                # Re-queue later without holding a worker for the backoff period
+                timer = threading.Timer(delay, self._requeue, args=(item,))
+                timer.daemon = True
+                timer.start()
+            else:
+                self._count("failed", channel)
+                print(f"Error sending {channel} message: {e}")
+            return
+
+        with self._lock:
+            self._latency_total += time.time() - item["queued"]
+        self._count("sent", channel)
+        print(f"{channel} message sent: {item['body']}")
+
+    def _requeue(self, item):
+        try:
+            self._queues[item["channel"]].put_nowait(item)
+        except queue.Full:
+            self._count("dropped", item["channel"])
+
+    def metrics(self):
+        with self._lock:
+            counts = dict(self._counts)
+            sent = counts.get("sent", 0)
+            return {
+                "queue_depth": sum(q.qsize() for q in self._queues.values()),
+                "sent": sent,
+                "failed": counts.get("failed", 0),
+                "retried": counts.get("retried", 0),
+                "dropped": counts.get("dropped", 0),
+                "avg_delivery_s": self._latency_total / sent if sent else None,
+                "by_channel": {k: v for k, v in counts.items() if "." in k},
+            }
+
+
+def get_dispatcher(account_sid, auth_token, senders):
+    """Process-wide dispatcher; the first caller's credentials and numbers are used."""
+    def build():
+        return NotificationDispatcher(
+            lambda: build_twilio_client(account_sid, auth_token),
+            senders,
+            rates={
+                # Twilio defaults: 1 SMS/s per long code; WhatsApp senders allow far more
+                "SMS": env_float("TWILIO_SMS_RATE", 1.0),
+                "WhatsApp": env_float("TWILIO_WHATSAPP_RATE", 20.0),
+            },
+            workers=env_int("NOTIFY_WORKERS", 2),
+            queue_size=env_int("NOTIFY_QUEUE_SIZE", 1000),
+        )
+
+    return registry.get_shared("notification_dispatcher", build)
@@ -0,0 +1,129 @@
+"""PDF text extraction for PrescriptionReader, done once per file.
+
+Pages are read with pdfplumber. Long documents are split into page ranges
+that a shared process pool extracts in parallel, and the pages are yielded
+in order as their range completes, so the preview can fill in while the rest
+is still being parsed. The result is cached by the file's SHA-256 (and the
+page cap), so the preview and the analysis, and every rerun, share one pass.
+
+For analysis each page is routed separately: pages with a usable text layer
+are sent as text, and scanned pages without one are rasterised at
+RASTER_DPI and sent as compressed images, so mixed documents work in one go.
+"""
+
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+from utils import registry
+from utils.config import env_int
+from utils.images import prepare_image
+from utils.ttl_cache import TTLCache
+
+MAX_PAGES = env_int("PDF_MAX_PAGES", 50)
+PARALLEL_MIN_PAGES = env_int("PDF_PARALLEL_MIN_PAGES", 8)    # shorter files are read in-process
+PAGES_PER_TASK = 4
+RASTER_DPI = env_int("PDF_RASTER_DPI", 150)
+MIN_TEXT_CHARS = env_int("PDF_MIN_TEXT_CHARS", 40)    # fewer than this and the page is treated as scanned
+
+_cache = TTLCache(max_entries=env_int("PDF_CACHE_SIZE", 32), ttl=6 * 3600)
+
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _extract_range(data, start, stop):
+    """Text of pages [start, stop); pages without a text layer give ""."""
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+
+
+def _rasterise_pages(data, indices, dpi):
+    """Compressed Gemini image parts of the given pages."""
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [prepare_image(pdf.pages[i].to_image(resolution=dpi).original, "document")[0] for i in indices]
+
+
+def _get_pool():
+    def build():
+        # Spawned, not forked: the server process is full of threads (scheduler, dispatcher, HTTP pool,
+        # tornado), and a forked child can deadlock on a lock one of them held at fork time
+        return ProcessPoolExecutor(max_workers=env_int("PDF_WORKERS", min(4, os.cpu_count() or 1)),
+                                   mp_context=multiprocessing.get_context("spawn"))
+
+    return registry.get_shared("pdf_pool", build)
+
+
+def iter_pdf_pages(data, max_pages=MAX_PAGES):
+    """Yield (page number from 1, pages to read, text) for up to max_pages pages, in order.
+
+    Only the first call for a file does any parsing; later calls replay the
+    cached pages.
+    """
+    key = f"{file_digest(data)}:{max_pages}"
+    cached = _cache.get(key)
+    if cached is not None:
+        for number, text in enumerate(cached, start=1):
+            yield number, len(cached), text
+        return
+
+    pages = []
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        count = min(len(pdf.pages), max_pages)
+        if count < PARALLEL_MIN_PAGES:
+            for page in pdf.pages[:count]:
+                pages.append(page.extract_text() or "")
+                yield len(pages), count, pages[-1]
+
+    if len(pages) < count:
+        pool = _get_pool()
+        tasks = math.ceil(count / PAGES_PER_TASK)
+        futures = [pool.submit(_extract_range, data, i * PAGES_PER_TASK, min((i + 1) * PAGES_PER_TASK, count))
+                   for i in range(tasks)]
+        for future in futures:
+            for text in future.result():
+                pages.append(text)
+                yield len(pages), count, text
+
+    _cache.set(key, pages)
+
+
+def extract_pdf_pages(data, max_pages=MAX_PAGES):
+    """List of page texts (cached), for up to max_pages pages."""
+    return [text for _, _, text in iter_pdf_pages(data, max_pages)]
+
+
+def extract_pdf_text(data, max_pages=MAX_PAGES):
+    """Text of the first max_pages pages, one blank line between pages."""
+    return "\n\n".join(text for text in extract_pdf_pages(data, max_pages) if text)
+
+
+def extract_pdf_content(data, max_pages=MAX_PAGES, dpi=RASTER_DPI):
+    """Model input for each page (cached): {"number", "text"} for pages with a text layer,
+    {"number", "image"} with a Gemini image part for scanned pages."""
+    def build():
+        texts = extract_pdf_pages(data, max_pages)
+        scanned = [i for i, text in enumerate(texts) if len(text.strip()) < MIN_TEXT_CHARS]
+
+        images = []
+        if len(scanned) > PAGES_PER_TASK:
+            pool = _get_pool()
+            futures = [pool.submit(_rasterise_pages, data, scanned[i:i + PAGES_PER_TASK], dpi)
+                       for i in range(0, len(scanned), PAGES_PER_TASK)]
+            for future in futures:
+                images.extend(future.result())
+        elif scanned:
+            images = _rasterise_pages(data, scanned, dpi)
+
+        content = [{"number": i + 1, "text": text} for i, text in enumerate(texts)]
+        for i, image in zip(scanned, images):
+            content[i] = {"number": i + 1, "image": image}
+        return content
+
+    return _cache.get_or_compute(f"{file_digest(data)}:{max_pages}:{dpi}:content", build)
@@ -0,0 +1,72 @@
+"""HTML rendering of FindDoctor result cards.
+
+The whole card grid is built as one escaped HTML string and sent with a
+single ``st.markdown`` call, instead of one ``st.columns`` row and one
+markdown element per card. Rendered fragments are cached per (result set,
+number of cards shown, digest of those cards' fields), so reruns of the same
+results cost nothing, and a refreshed result set with the same id (after the
+Places TTL runs out) is rendered again instead of showing the old cards.
+"""
+
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from urllib.parse import quote_plus
+
+PAGE_SIZE = 12
+
+_lock = threading.Lock()
+_fragments = OrderedDict()
+_MAX_FRAGMENTS = 256
+
+
+def format_distance(meters):
+    return f"{meters:.0f} m" if meters < 1000 else f"{meters / 1000:.1f} km"
+
+
+def _card(service, city):
+    formatting = service.get("structured_formatting", {})
+    name = formatting.get("main_text", "")
+    address = formatting.get("secondary_text", "")
+    url = "https://www.google.com/search?q=" + quote_plus(f"{name} {city}")
+    distance = service.get("distance_m")
+    distance_html = f'<div class="service-distance">{format_distance(distance)} away</div>' if distance is not None else ""
+    return (
+        f'<a href="{html.escape(url)}" target="_blank">'
+        f'<div class="service-card">'
+        f'<div class="service-name">{html.escape(name)}</div>'
+        f'<div class="service-address">{html.escape(address)}</div>'
+        f'{distance_html}'
+        f'</div></a>'
+    )
+
+
+def _digest(predictions, city):
+    """Digest of everything _card reads from predictions."""
+    digest = hashlib.blake2b(city.encode("utf-8"), digest_size=16)
+    for service in predictions:
+        formatting = service.get("structured_formatting", {})
+        digest.update(repr((formatting.get("main_text"), formatting.get("secondary_text"),
+                            service.get("distance_m"))).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_cards(result_id, predictions, city, count):
+    """HTML for the first count cards of a result set, from the fragment cache when possible."""
+    key = (result_id, count, _digest(predictions[:count], city))
+    with _lock:
+        fragment = _fragments.get(key)
+        if fragment is not None:
+            _fragments.move_to_end(key)
+            return fragment
+
+    # No newlines or indentation: Markdown would turn indented HTML into a code block
+    fragment = '<div class="service-grid">' + "".join(
+        _card(service, city) for service in predictions[:count]) + "</div>"
+
+    with _lock:
+        _fragments[key] = fragment
+        while len(_fragments) > _MAX_FRAGMENTS:
+            _fragments.popitem(last=False)
+    return fragment
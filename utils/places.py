@@ -0,0 +1,269 @@
+"""Healthcare place search for FindDoctor, with a shared result cache.
+
+Searches are normalised before they reach the Places API: the centre is
+snapped to a geohash cell, the service type is lower-cased and the radius is
+rounded up to a bucket. The provider is called from the cell centre with that
+radius padded by the cell's half-diagonal, so the results cover the whole
+requested circle wherever in the cell the user is. Identical normalised searches from any session share
+one cache entry (TTL + LRU, optionally backed by SQLite), and concurrent
+identical searches are coalesced into a single API call.
+
+Where the results come from is up to a provider: the Ola Maps API by default,
+or a local facility dataset (utils/facilities.py) selected with
+PLACES_PROVIDER=local.
+"""
+
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils import registry
+from utils.config import cache_path, env_int
+from utils.geo import geohash_center, geohash_encode, geohash_half_diagonal_m, haversine_m
+from utils.ttl_cache import SqliteBackend, TTLCache
+
+OLA_PLACES_URL = os.getenv("OLA_PLACES_URL", "https://api.olamaps.io/places/v1/nearbysearch")
+
+GEOHASH_PRECISION = 5        # ~4.9 km cells
+RADIUS_BUCKET_M = 5000
+REQUEST_TIMEOUT = (5, 15)    # connect, read
+
+# Service types in one query, separated by "," ";" or "/": "Dentist, Hospital", "clinic / pharmacy".
+# Not by "and" or "&", which belong to specialty names ("Obstetrics and gynaecology"), and
+# "Ear, nose and throat" is kept whole despite its comma.
+_SERVICE_TYPE = re.compile(r"ear\s*,\s*nose\s*,?\s*(?:and|&)\s*throat|[^,;/]+", re.IGNORECASE)
+
+_executor = ThreadPoolExecutor(max_workers=env_int("PLACES_WORKERS", 4), thread_name_prefix="places")
+# Speculative searches get their own small pool so they never hold up a user's search
+_prefetch_executor = ThreadPoolExecutor(max_workers=env_int("PLACES_PREFETCH_WORKERS", 2),
+                                        thread_name_prefix="places-prefetch")
+
+# Service types warmed up as soon as a city is chosen, at the page's default radius
+DEFAULT_RADIUS_M = 60000
+PREFETCH_TYPES = [t.strip().lower() for t in
+                  os.getenv("PLACES_PREFETCH_TYPES", "hospital,clinic,pharmacy,dentist").split(",") if t.strip()]
+
+
+class PlacesError(Exception):
+    """The Places API answered with an error status."""
+
+    def __init__(self, status_code, message=""):
+        super().__init__(f"Unable to fetch data (Status Code: {status_code}) {message}".strip())
+        self.status_code = status_code
+
+
+def normalise_service_type(service_type):
+    return re.sub(r"\s+", " ", service_type.strip().lower())
+
+
+def split_service_types(text):
+    """Distinct normalised service types in a free-text query, in the order given."""
+    types = []
+    for part in _SERVICE_TYPE.findall(text or ""):
+        part = normalise_service_type(part)
+        if part and part not in types:
+            types.append(part)
+    return types
+
+
+def _dedupe_key(prediction):
+    formatting = prediction.get("structured_formatting", {})
+    name = re.sub(r"[^\w]+", " ", formatting.get("main_text", "").lower()).strip()
+    address = re.sub(r"[^\w]+", " ", formatting.get("secondary_text", "").lower()).strip()
+    return name, address
+
+
+def _location(prediction):
+    location = (prediction.get("geometry") or {}).get("location") or {}
+    try:
+        return float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def normalise_query(lat, lon, service_type, radius_m):
+    """Cache key parts: (geohash cell, service type, radius rounded up to RADIUS_BUCKET_M)."""
+    radius_bucket = -(-int(radius_m) // RADIUS_BUCKET_M) * RADIUS_BUCKET_M
+    return geohash_encode(lat, lon, GEOHASH_PRECISION), normalise_service_type(service_type), radius_bucket
+
+
+def query_key(lat, lon, service_type, radius_m):
+    """Cache key shared by every search that normalises to the same query."""
+    return "|".join(str(part) for part in normalise_query(lat, lon, service_type, radius_m))
+
+
+class PrefetchBudget:
+    """Per-session limits on speculative searches: how many run at once and how many in total.
+
+    Kept in st.session_state, so one user clicking through cities cannot use
+    up the Places API quota or the prefetch workers for everyone else.
+    """
+
+    def __init__(self, max_concurrent=None, quota=None):
+        self.max_concurrent = max_concurrent or env_int("PLACES_PREFETCH_CONCURRENCY", 2)
+        self.quota = quota or env_int("PLACES_PREFETCH_QUOTA", 20)
+        self.inflight = 0
+        self.used = 0
+        self._requested = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Claim a slot for key; False if it was already requested or the budget is spent."""
+        with self._lock:
+            if key in self._requested or self.inflight >= self.max_concurrent or self.used >= self.quota:
+                return False
+            self._requested.add(key)
+            self.inflight += 1
+            self.used += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+
+class PlacesProvider:
+    """Source of nearby facilities, returned as Places-style predictions.
+
+    A prediction is a dict with at least ``structured_formatting`` (``main_text``
+    and ``secondary_text``). Providers whose answers are expensive to get set
+    ``cacheable`` so PlacesClient puts them behind the shared cache.
+    """
+
+    cacheable = True
+
+    def nearby(self, lat, lon, service_type, radius_m):
+        raise NotImplementedError
+
+
+class OlaPlacesProvider(PlacesProvider):
+    def __init__(self, api_key, api_url=OLA_PLACES_URL, limit=50):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.limit = limit
+        self._session = requests.Session()
+
+    def nearby(self, lat, lon, service_type, radius_m):
+        params = {
+            "layers": "{}",
+            "types": service_type,
+            "location": f"{lat},{lon}",
+            "radius": radius_m,
+            "api_key": self.api_key,
+            "limit": self.limit,
+        }
+        response = self._session.get(self.api_url, params=params, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            raise PlacesError(response.status_code)
+        return response.json().get("predictions") or []
+
+
+class PlacesClient:
+    def __init__(self, provider, cache=None):
+        self.provider = provider
+        self.cache = cache or TTLCache()
+
+    def search(self, lat, lon, service_type, radius_m):
+        """Predictions for service_type around (lat, lon), served from the cache when possible."""
+        if not self.provider.cacheable:
+            return self.provider.nearby(lat, lon, normalise_service_type(service_type), radius_m)
+
+        cell, service, radius_bucket = normalise_query(lat, lon, service_type, radius_m)
+        center_lat, center_lon = geohash_center(cell)
+        # (lat, lon) can be anywhere in the cell, up to its half-diagonal from the centre
+        search_radius = radius_bucket + math.ceil(geohash_half_diagonal_m(cell))
+        return self.cache.get_or_compute(query_key(lat, lon, service_type, radius_m),
+                                         lambda: self.provider.nearby(center_lat, center_lon, service, search_radius))
+
+    def search_many(self, lat, lon, service_text, radius_m):
+        """Search every service type in service_text at once; merged, de-duplicated and nearest first.
+
+        Each returned prediction is a copy with ``distance_m`` set (metres from
+        (lat, lon), None when it can't be known). Results farther than radius_m
+        are dropped: cached searches are centred on the geohash cell and use a
+        rounded-up, padded radius, so they can reach past it. For the same
+        reason the provider's own ``distance_meters`` is only used when the
+        provider was called at (lat, lon), i.e. when it is not cacheable.
+        """
+        types = split_service_types(service_text)
+        # Cached searches are measured from the cell centre, up to ~3.3 km from the user
+        trust_distance = not self.provider.cacheable
+        futures = [_executor.submit(self.search, lat, lon, service_type, radius_m) for service_type in types]
+
+        merged = {}
+        for future in futures:
+            for prediction in future.result():
+                key = _dedupe_key(prediction)
+                if key in merged:
+                    continue
+                location = _location(prediction)
+                if location:
+                    distance = float(haversine_m(lat, lon, *location))
+                else:
+                    distance = prediction.get("distance_meters") if trust_distance else None
+                if distance is not None and distance > radius_m:
+                    continue
+                merged[key] = dict(prediction, distance_m=distance)
+
+        return sorted(merged.values(), key=lambda p: (p["distance_m"] is None, p["distance_m"] or 0))
+
+    def prefetch(self, lat, lon, service_types, radius_m, budget):
+        """Warm the cache for service_types around (lat, lon) in the background; returns how many were started.
+
+        Searches already cached, already requested by this session or beyond
+        the budget are skipped (the last ones get another chance on a later
+        rerun). A user search for the same query while a prefetch is still in
+        flight waits for it instead of calling the API again.
+        """
+        if not self.provider.cacheable:
+            return 0
+
+        started = 0
+        for service_type in service_types:
+            key = query_key(lat, lon, service_type, radius_m)
+            if key in self.cache or not budget.acquire(key):
+                continue
+
+            def run(service_type=service_type):
+                try:
+                    self.search(lat, lon, service_type, radius_m)
+                except Exception as e:
+                    print(f"Prefetch of {service_type!r} failed: {e}")
+                finally:
+                    budget.release()
+
+            _prefetch_executor.submit(run)
+            started += 1
+        return started
+
+
+def build_provider():
+    """Places provider picked by PLACES_PROVIDER: "ola" (default) or "local"."""
+    name = os.getenv("PLACES_PROVIDER", "ola").lower()
+    if name == "local":
+        from utils.facilities import FACILITY_DATASET, FacilityProvider
+        return FacilityProvider.load(os.getenv("FACILITY_DATASET", FACILITY_DATASET))
+    if name != "ola":
+        raise ValueError(f"Unknown PLACES_PROVIDER: {name}")
+    return OlaPlacesProvider(os.getenv("OLA_API_KEY"))
+
+
+def get_places_client():
+    """Process-wide Places client and cache, configured from the environment."""
+    def build():
+        backend = None
+        if os.getenv("PLACES_CACHE_BACKEND", "memory").lower() == "sqlite":
+            backend = SqliteBackend(cache_path("places_cache.sqlite3"),
+                                    max_entries=env_int("PLACES_CACHE_DISK_ENTRIES", 20000))
+        cache = TTLCache(
+            max_entries=env_int("PLACES_CACHE_SIZE", 1000),
+            ttl=env_int("PLACES_CACHE_TTL", 6 * 3600),
+            backend=backend,
+        )
+        return PlacesClient(build_provider(), cache=cache)
+
+    return registry.get_shared("places_client", build)
@@ -0,0 +1,106 @@
+"""Process-wide registry of provider clients and other shared resources.
+
+Streamlit re-executes every page script on each interaction, so anything built
+at the top level of a page (an LLM client, a model handle, an index) is rebuilt
+on every rerun of every session. Pages fetch such objects from here instead:
+each one is created once per process, under a lock, and then reused by all
+sessions and background threads.
+"""
+
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Keep-alive pool shared by every HTTP-based provider client
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=120.0)
+
+_lock = threading.Lock()
+_key_locks = {}    # key -> lock held while that key's factory runs
+_resources = {}
+_warmed_up = False
+
+
+def _key_lock(key):
+    with _lock:
+        return _key_locks.setdefault(key, threading.RLock())
+
+
+def get_shared(key, factory):
+    """Return the resource registered under key, creating it with factory on first use.
+
+    Only callers of the same key wait for its factory; a slow factory (loading
+    an index, opening a dataset) does not hold up other resources.
+    """
+    resource = _resources.get(key)
+    if resource is None:
+        with _key_lock(key):
+            resource = _resources.get(key)
+            if resource is None:
+                resource = factory()
+                _resources[key] = resource
+    return resource
+
+
+def get_http_client():
+    """Pooled HTTP/1.1 client whose connections (and TLS sessions) stay open between calls."""
+    return get_shared("http_client", lambda: httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS))
+
+
+def get_groq_client():
+    """Groq SDK client, used directly by the Mental Health chatbot."""
+    def build():
+        from groq import Groq
+        return Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=get_http_client())
+
+    return get_shared("groq_client", build)
+
+
+def get_chat_groq(model_name, **kwargs):
+    """LangChain ChatGroq handle for model_name, shared across sessions."""
+    def build():
+        from langchain_groq import ChatGroq
+        return ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name=model_name,
+                        http_client=get_http_client(), **kwargs)
+
+    key = ("chat_groq", model_name) + tuple(sorted(kwargs.items()))
+    return get_shared(key, build)
+
+
+def _configure_gemini():
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    return genai
+
+
+def get_gemini_model(model_name):
+    """Gemini GenerativeModel handle for model_name; the API is configured once per process."""
+    def build():
+        genai = get_shared("gemini", _configure_gemini)
+        return genai.GenerativeModel(model_name)
+
+    return get_shared(("gemini_model", model_name), build)
+
+
+def _open_connection(url):
+    try:
+        get_http_client().head(url)
+    except httpx.HTTPError as e:
+        print(f"Warm-up request to {url} failed: {e}")
+
+
+def warm_up():
+    """Open connections to the providers once per process so the first user request skips the TLS handshake."""
+    global _warmed_up
+    with _lock:
+        if _warmed_up:
+            return
+        _warmed_up = True
+
+    # Gemini talks gRPC through its own channel; configuring it up front is all that can be pre-paid
+    get_shared("gemini", _configure_gemini)
+    threading.Thread(target=_open_connection, args=("https://api.groq.com",), daemon=True).start()
@@ -0,0 +1,44 @@
+"""WhatsApp/SMS alerts for reminders, independent of any page.
+
+The reminder scheduler calls ``deliver_reminder`` from its own threads, so
+the handler, the Twilio dispatcher and the health-fact pool are all built
+here from the environment rather than inside the Reminder page script. This
+lets ``start_reminders`` run as soon as the process serves its first page,
+so reminders recovered from the store fire on time after a restart.
+"""
+
+import os
+
+from utils.health_facts import get_fact_pool
+from utils.notifications import get_dispatcher
+from utils.reminders import get_scheduler
+
+
+def get_reminder_dispatcher():
+    """Queued, rate-limited delivery shared by the scheduler and every session (credentials from .env)."""
+    return get_dispatcher(os.getenv("account_sid", ""), os.getenv("auth_token", ""), senders={
+        "WhatsApp": (os.getenv("TWILIO_WHATSAPP_NUMBER", ""), os.getenv("USER_WHATSAPP_NUMBER", "")),
+        "SMS": (os.getenv("twilio_number", ""), os.getenv("USER_SMS_NUMBER", "")),
+    })
+
+
+def send_alert(channel, message):
+    """Queue message on channel ("WhatsApp" or "SMS"); delivered in the background."""
+    if not get_reminder_dispatcher().submit(channel, message):
+        print(f"{channel} queue full, message dropped")
+
+
+def deliver_reminder(reminder):
+    """Scheduler handler: send a due reminder, with a health tip, on its channels."""
+    health_fact = get_fact_pool().take()
+    reminder_time = reminder["datetime"].strftime('%Y-%m-%d %H:%M:%S %Z')
+    full_message = (f"⏰ Reminder Alert! 📅\nMessage: {reminder['message']}\nTime: {reminder_time}"
+                    f"\n\n💡 Health Tip: {health_fact}")
+    for channel in ("WhatsApp", "SMS"):
+        if channel in reminder["channels"]:
+            send_alert(channel, full_message)
+
+
+def start_reminders():
+    """Start the process-wide reminder scheduler (once); returns it."""
+    return get_scheduler(deliver_reminder)
@@ -0,0 +1,183 @@
+"""Persistent reminder store and the process-wide scheduler that fires reminders.
+
+Reminders live in SQLite, so they survive restarts. A single scheduler thread
+per process keeps a min-heap of (due time, reminder id) and sleeps on a
+condition variable until the earliest deadline (or until a new reminder is
+added), so there is no polling and the number of threads does not grow with
+the number of sessions. Firing is handed to a small worker pool so a slow
+notification never delays the next deadline.
+"""
+
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytz
+
+from utils import registry
+from utils.config import cache_path
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Seconds between occurrences of a repeating reminder
+PERIODS = {"Daily": 24 * 3600, "Weekly": 7 * 24 * 3600}
+
+
+def next_due(due, frequency, now):
+    """Next occurrence after now of a reminder that was due at due, or None if it does not repeat."""
+    period = PERIODS.get(frequency)
+    if period is None:
+        return None
+    missed = int((now - due) // period) + 1 if now >= due else 1
+    return due + missed * period
+
+
+class ReminderStore:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("reminders.sqlite3"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS reminders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    message TEXT NOT NULL,
+                    due REAL NOT NULL,
+                    frequency TEXT NOT NULL,
+                    channels TEXT NOT NULL,
+                    active INTEGER NOT NULL DEFAULT 1,
+                    created REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS reminders_active_due ON reminders (active, due)")
+
+    @staticmethod
+    def _to_reminder(row):
+        return {
+            "id": row["id"],
+            "message": row["message"],
+            "datetime": datetime.fromtimestamp(row["due"], IST),
+            "due": row["due"],
+            "frequency": row["frequency"],
+            "channels": json.loads(row["channels"]),
+            "triggered": not row["active"],
+        }
+
+    def add(self, message, when, frequency, channels):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO reminders (message, due, frequency, channels, created) VALUES (?, ?, ?, ?, ?)",
+                (message, when.timestamp(), frequency, json.dumps(channels), time.time()),
+            )
+        return self.get(cursor.lastrowid)
+
+    def get(self, reminder_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        return self._to_reminder(row) if row else None
+
+    def reschedule(self, reminder_id, due):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE reminders SET due = ? WHERE id = ?", (due, reminder_id))
+
+    def deactivate(self, reminder_id):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE reminders SET active = 0 WHERE id = ?", (reminder_id,))
+
+    def active_deadlines(self):
+        """(due, id) for every active reminder, for rebuilding the scheduler heap."""
+        with self._lock:
+            return [(row[0], row[1]) for row in
+                    self._conn.execute("SELECT due, id FROM reminders WHERE active = 1")]
+
+    def upcoming(self, limit=20):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM reminders WHERE active = 1 ORDER BY due LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_reminder(row) for row in rows]
+
+
+class ReminderScheduler:
+    def __init__(self, store, handler=None, workers=4):
+        self.store = store
+        self.handler = handler
+        self._heap = []
+        self._cond = threading.Condition()
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reminder")
+        self._thread = None
+
+    def start(self):
+        """Recover active reminders from the store and start the timer thread."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._heap = self.store.active_deadlines()
+            heapq.heapify(self._heap)
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+        print(f"Reminder scheduler started with {len(self._heap)} active reminders")
+
+    def add(self, message, when, frequency, channels):
+        """Persist a new reminder and schedule it; returns the stored reminder."""
+        reminder = self.store.add(message, when, frequency, channels)
+        self._push(reminder["due"], reminder["id"])
+        print(f"Scheduled: {message} at {reminder['datetime']} ({frequency})")
+        return reminder
+
+    def _push(self, due, reminder_id):
+        with self._cond:
+            heapq.heappush(self._heap, (due, reminder_id))
+            # Only an earlier deadline changes how long the timer thread should sleep
+            if self._heap[0][1] == reminder_id:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, reminder_id = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+            self._fire(due, reminder_id)
+
+    def _fire(self, due, reminder_id):
+        reminder = self.store.get(reminder_id)
+        # Entries for deleted, finished or rescheduled reminders are simply dropped
+        if reminder is None or reminder["triggered"] or reminder["due"] != due:
+            return
+
+        following = next_due(due, reminder["frequency"], time.time())
+        if following is None:
+            self.store.deactivate(reminder_id)
+        else:
+            self.store.reschedule(reminder_id, following)
+            self._push(following, reminder_id)
+
+        if self.handler is not None:
+            self._workers.submit(self._call_handler, reminder)
+
+    def _call_handler(self, reminder):
+        try:
+            self.handler(reminder)
+        except Exception as e:
+            print(f"Error firing reminder {reminder['id']}: {e}")
+
+
+def get_scheduler(handler):
+    """The process-wide scheduler, started on first use; handler is called with each reminder that falls due."""
+    def build():
+        scheduler = ReminderScheduler(ReminderStore(), handler)
+        scheduler.start()
+        return scheduler
+
+    return registry.get_shared("reminder_scheduler", build)
@@ -0,0 +1,215 @@
+"""Retrieval of medical reference passages for the HealthDecoder prompt.
+
+The index is built offline by ``scripts/build_medical_index.py`` from a folder
+of ``.txt`` / ``.jsonl`` documents and lives in ``MEDICAL_INDEX_DIR``:
+
+- ``index.faiss``   FAISS inner-product index over passage embeddings
+- ``passages.jsonl`` one ``{"text", "source"}`` object per passage, in index order
+- ``offsets.npy``   byte offset of every line of passages.jsonl
+- ``manifest.json`` source files already indexed, so new files can be appended
+
+At startup the index and the offsets are memory-mapped, so loading costs
+nothing up front and passages are read from disk only when they are returned.
+"""
+
+import glob
+import json
+import os
+import re
+import threading
+
+import faiss
+import numpy as np
+
+from utils import registry
+from utils.config import env_int
+from utils.embeddings import HashingEmbedder
+from utils.text import estimate_tokens
+
+INDEX_DIR = os.getenv("MEDICAL_INDEX_DIR", os.path.join("data", "medical_index"))
+DEFAULT_CONTEXT = "Healthcare general knowledge"
+
+PASSAGE_WORDS = 120
+TOP_K = env_int("RETRIEVAL_TOP_K", 5)
+TOKEN_BUDGET = env_int("RETRIEVAL_TOKEN_BUDGET", 600)
+
+
+def split_passages(text, max_words=PASSAGE_WORDS):
+    """Split a document into passages of about max_words words along paragraph boundaries."""
+    passages, current, count = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if count and count + len(words) > max_words:
+            passages.append(" ".join(current))
+            current, count = [], 0
+        # Very long paragraphs are cut into fixed windows
+        while len(words) > max_words:
+            passages.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        current.extend(words)
+        count += len(words)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def read_corpus(path):
+    """Yield (source, text) for every document in a .txt file or a .jsonl file of {"text", "source"} objects."""
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    doc = json.loads(line)
+                    yield doc.get("source", f"{os.path.basename(path)}:{line_no}"), doc["text"]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield os.path.basename(path), f.read()
+
+
+class IndexBuilder:
+    """Builds the passage index in batches, or appends new corpus files to an existing one."""
+
+    def __init__(self, index_dir=INDEX_DIR, embedder=None, batch_size=256):
+        self.index_dir = index_dir
+        self.embedder = embedder or HashingEmbedder()
+        self.batch_size = batch_size
+
+    def _paths(self):
+        return {name: os.path.join(self.index_dir, name)
+                for name in ("index.faiss", "passages.jsonl", "offsets.npy", "manifest.json")}
+
+    def build(self, corpus_dir, append=False):
+        """Index every corpus file not indexed yet; returns the number of passages added."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        paths = self._paths()
+
+        if append and os.path.exists(paths["index.faiss"]):
+            index = faiss.read_index(paths["index.faiss"])
+            offsets = list(np.load(paths["offsets.npy"]))
+            with open(paths["manifest.json"], "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            mode = "ab"
+        else:
+            index = faiss.IndexFlatIP(self.embedder.dim)
+            offsets, manifest, mode = [], {}, "wb"
+
+        files = sorted(glob.glob(os.path.join(corpus_dir, "**", "*.txt"), recursive=True)
+                       + glob.glob(os.path.join(corpus_dir, "**", "*.jsonl"), recursive=True))
+        added = 0
+        batch = []
+
+        with open(paths["passages.jsonl"], mode) as out:
+            position = out.tell()
+
+            def flush():
+                nonlocal position, added
+                if not batch:
+                    return
+                index.add(self.embedder.embed([p["text"] for p in batch]))
+                for passage in batch:
+                    line = (json.dumps(passage, ensure_ascii=False) + "\n").encode("utf-8")
+                    offsets.append(position)
+                    out.write(line)
+                    position += len(line)
+                added += len(batch)
+                batch.clear()
+
+            for path in files:
+                key = os.path.relpath(path, corpus_dir)
+                mtime = os.path.getmtime(path)
+                if key in manifest:
+                    if manifest[key] != mtime:
+                        print(f"{key} changed since it was indexed; rebuild without --append to refresh it")
+                    continue
+                for source, text in read_corpus(path):
+                    for passage in split_passages(text):
+                        batch.append({"text": passage, "source": source})
+                        if len(batch) >= self.batch_size:
+                            flush()
+                manifest[key] = mtime
+            flush()
+
+        # Index and offsets are written last so a reader never sees offsets past the passages file
+        faiss.write_index(index, paths["index.faiss"] + ".tmp")
+        np.save(paths["offsets.npy"] + ".tmp.npy", np.asarray(offsets, dtype=np.int64))
+        os.replace(paths["index.faiss"] + ".tmp", paths["index.faiss"])
+        os.replace(paths["offsets.npy"] + ".tmp.npy", paths["offsets.npy"])
+        with open(paths["manifest.json"], "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return added
+
+
+class MedicalRetriever:
+    def __init__(self, index_dir=INDEX_DIR, embedder=None):
+        self.index_dir = index_dir
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        self._index = None
+        self._offsets = None
+        self._loaded_stamp = None
+
+    @property
+    def available(self):
+        return os.path.exists(os.path.join(self.index_dir, "index.faiss"))
+
+    def _load_if_changed(self):
+        index_file = os.path.join(self.index_dir, "index.faiss")
+        offsets_file = os.path.join(self.index_dir, "offsets.npy")
+        # IndexBuilder replaces the two files one after the other, so either changing means a rebuild
+        stamp = (os.stat(index_file).st_mtime_ns, os.stat(offsets_file).st_mtime_ns)
+        if stamp == self._loaded_stamp:
+            return
+        try:
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Index types without mmap support are read into memory instead
+            index = faiss.read_index(index_file)
+        offsets = np.load(offsets_file, mmap_mode="r")
+        if len(offsets) < index.ntotal:
+            # Caught between the builder's two renames: keep the previous pair and look again next search
+            return
+        self._index, self._offsets, self._loaded_stamp = index, offsets, stamp
+
+    def _read_passage(self, f, position):
+        f.seek(int(self._offsets[position]))
+        return json.loads(f.readline())
+
+    def search(self, query, k=5):
+        """Top-k passages for query as (score, passage) pairs, best first."""
+        if not self.available:
+            return []
+        vector = self.embedder.embed_query(query).reshape(1, -1)
+        with self._lock:
+            self._load_if_changed()
+            if self._index is None or not self._index.ntotal:
+                return []
+            scores, ids = self._index.search(vector, min(k, self._index.ntotal))
+            with open(os.path.join(self.index_dir, "passages.jsonl"), "rb") as f:
+                return [(float(score), self._read_passage(f, position))
+                        for score, position in zip(scores[0], ids[0]) if position >= 0]
+
+    def context_for(self, query, k=TOP_K, token_budget=TOKEN_BUDGET, min_score=0.1):
+        """Top passages for query joined into a prompt context within token_budget, or DEFAULT_CONTEXT."""
+        try:
+            results = self.search(query, k)
+        except Exception as e:    # a half-written or corrupt index must not break the chat turn
+            print(f"Retrieval failed, answering without reference passages: {e}")
+            return DEFAULT_CONTEXT
+
+        parts, used = [], 0
+        for score, passage in results:
+            if score < min_score:
+                break
+            cost = estimate_tokens(passage["text"])
+            if used + cost > token_budget:
+                break
+            parts.append(f"[{passage['source']}] {passage['text']}")
+            used += cost
+        return "\n\n".join(parts) if parts else DEFAULT_CONTEXT
+
+
+def get_retriever():
+    """Process-wide retriever over MEDICAL_INDEX_DIR."""
+    return registry.get_shared("medical_retriever", MedicalRetriever)
@@ -0,0 +1,179 @@
+"""Semantic cache of chat answers backed by a FAISS inner-product index.
+
+Questions are embedded and looked up by cosine similarity, so rephrasings of a
+question that was already answered (in the same language) are served from the
+cache without a provider call. A similar question only counts as the same
+one when its key terms (numbers and units, negations, medical terms) and its
+content words match exactly, so "20 kg child" never gets the "40 kg child"
+answer, nor "low blood pressure" the "high blood pressure" one. Entries expire
+after a TTL, the least recently used ones are evicted past a size limit, and
+the index plus its metadata are written to disk so the cache survives
+restarts.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+from utils import registry
+from utils.config import cache_dir, env_float, env_int
+from utils.embeddings import HashingEmbedder, content_words, key_terms
+
+# How many neighbours to inspect; more than one so other-language entries can be skipped
+SEARCH_K = 8
+
+
+class SemanticCache:
+    def __init__(self, directory, embedder=None, threshold=0.9, ttl=24 * 3600, max_entries=5000,
+                 save_interval=30):
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> entry dict, least recently used first
+        self._next_id = 0
+        self._last_save = 0.0
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedder.dim))
+        self._load()
+
+    # --- persistence ---
+
+    @property
+    def _index_file(self):
+        return os.path.join(self.directory, "index.faiss")
+
+    @property
+    def _entries_file(self):
+        return os.path.join(self.directory, "entries.json")
+
+    def _load(self):
+        if not (os.path.exists(self._index_file) and os.path.exists(self._entries_file)):
+            return
+        try:
+            index = faiss.read_index(self._index_file)
+            with open(self._entries_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable semantic cache at {self.directory}: {e}")
+            return
+        if index.d != self.embedder.dim:
+            return
+        self._index = index
+        self._entries = OrderedDict((int(k), v) for k, v in data["entries"])
+        self._next_id = data["next_id"]
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_index = self._index_file + ".tmp"
+        tmp_entries = self._entries_file + ".tmp"
+        faiss.write_index(self._index, tmp_index)
+        with open(tmp_entries, "w", encoding="utf-8") as f:
+            json.dump({"next_id": self._next_id, "entries": list(self._entries.items())}, f, ensure_ascii=False)
+        os.replace(tmp_index, self._index_file)
+        os.replace(tmp_entries, self._entries_file)
+        self._last_save = time.time()
+        self._dirty = False
+
+    def _maybe_save_locked(self):
+        if self._dirty and time.time() - self._last_save >= self.save_interval:
+            self._save_locked()
+
+    # --- cache operations ---
+
+    def _remove_locked(self, ids):
+        if not ids:
+            return
+        self._index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for entry_id in ids:
+            self._entries.pop(entry_id, None)
+        self._dirty = True
+
+    def lookup(self, question, namespace):
+        """Return the cached answer for a similar question in namespace, or None."""
+        vector = self.embedder.embed_query(question).reshape(1, -1)
+        terms, words = key_terms(question), content_words(question)
+        now = time.time()
+        with self._lock:
+            if self._index.ntotal:
+                scores, ids = self._index.search(vector, min(SEARCH_K, self._index.ntotal))
+                expired = []
+                for score, entry_id in zip(scores[0], ids[0]):
+                    entry = self._entries.get(int(entry_id))
+                    if entry is None or score < self.threshold:
+                        continue
+                    if now - entry["created"] > self.ttl:
+                        expired.append(int(entry_id))
+                        continue
+                    # Lexically close is not enough: dose, age, type, drug and every other word must be the same
+                    if (entry["namespace"] == namespace and key_terms(entry["question"]) == terms
+                            and content_words(entry["question"]) == words):
+                        self._entries.move_to_end(int(entry_id))
+                        self._remove_locked(expired)
+                        self.hits += 1
+                        return entry["answer"]
+                self._remove_locked(expired)
+            self.misses += 1
+            return None
+
+    def store(self, question, namespace, answer):
+        if not answer:
+            return
+        vector = self.embedder.embed_query(question).reshape(1, -1)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                "question": question,
+                "namespace": namespace,
+                "answer": answer,
+                "created": time.time(),
+            }
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._remove_locked(list(self._entries)[:overflow])
+            self._dirty = True
+            self._maybe_save_locked()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_answer_cache():
+    """Process-wide HealthDecoder answer cache, configured from the environment."""
+    def build():
+        cache = SemanticCache(
+            cache_dir("semantic_cache"),
+            threshold=env_float("SEMANTIC_CACHE_THRESHOLD", 0.9),
+            ttl=env_int("SEMANTIC_CACHE_TTL", 24 * 3600),
+            max_entries=env_int("SEMANTIC_CACHE_MAX_ENTRIES", 5000),
+        )
+        atexit.register(cache.save)
+        return cache
+
+    return registry.get_shared("semantic_cache", build)
@@ -0,0 +1,80 @@
+"""Helpers for streaming LLM responses into Streamlit and timing them."""
+
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StreamMetrics:
+    """Wall-clock timings for one streamed response."""
+    started: float = field(default_factory=time.perf_counter)
+    first_token_at: float = None
+    finished_at: float = None
+    chunks: int = 0
+    output_tokens: int = None  # reported by the provider, when it does
+
+    @property
+    def tokens(self):
+        return self.output_tokens if self.output_tokens is not None else self.chunks
+
+    @property
+    def time_to_first_token(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    @property
+    def total_latency(self):
+        return None if self.finished_at is None else self.finished_at - self.started
+
+    @property
+    def tokens_per_second(self):
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        # Generation rate excludes the wait for the first token
+        elapsed = self.finished_at - self.first_token_at
+        return self.tokens / elapsed if elapsed > 0 else None
+
+    def as_dict(self):
+        return {
+            "ttft_s": self.time_to_first_token,
+            "total_s": self.total_latency,
+            "tokens": self.tokens,
+            "tokens_per_s": self.tokens_per_second,
+        }
+
+
+def timed_stream(chunks, metrics):
+    """Yield the text of each chunk (LangChain message chunks or plain strings), recording metrics."""
+    try:
+        for chunk in chunks:
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                metrics.output_tokens = (metrics.output_tokens or 0) + usage.get("output_tokens", 0)
+
+            text = getattr(chunk, "content", chunk)
+            if not text:
+                continue
+            if metrics.first_token_at is None:
+                metrics.first_token_at = time.perf_counter()
+            metrics.chunks += 1
+            yield text
+    finally:
+        metrics.finished_at = time.perf_counter()
+
+
+def iter_chat_deltas(stream):
+    """Yield the text deltas of an OpenAI-style (Groq) chat completion stream.
+
+    The underlying HTTP response is closed as soon as the consumer stops
+    iterating, so abandoning the generator also stops the generation.
+    """
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,7 @@
+"""Small text helpers shared by modules that should not import each other."""
+
+CHARS_PER_TOKEN = 4    # roughly, for English; close enough for budgeting
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
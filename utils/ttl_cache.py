@@ -0,0 +1,176 @@
+"""Thread-safe TTL + LRU cache with request coalescing and an optional SQLite tier.
+
+``get_or_compute`` makes concurrent callers asking for the same missing key
+share a single computation: the first caller runs it, the others wait for its
+result instead of repeating the (usually remote) call.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+MISSING = object()
+
+
+class SqliteBackend:
+    """Second cache tier on disk; values must be JSON-serialisable."""
+
+    def __init__(self, path, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get(self, key):
+        """(value, expires) or MISSING."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return MISSING
+            if row[1] < time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return MISSING
+            with self._conn:
+                self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires, time.time()),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                    (overflow,),
+                )
+
+
+class TTLCache:
+    def __init__(self, max_entries=1000, ttl=3600, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires), least recently used first
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key):
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        if entry[1] < time.time():
+            del self._entries[key]
+            return MISSING
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, value, expires):
+        # Caller holds self._lock
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_local(self, key):
+        with self._lock:
+            return self._lookup(key)
+
+    def _set_local(self, key, value, expires):
+        with self._lock:
+            self._store(key, value, expires)
+
+    def __contains__(self, key):
+        """Whether key is in memory and unexpired; leaves the counters and LRU order alone."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] >= time.time()
+
+    def get(self, key, default=None):
+        value = self._get_local(key)
+        if value is MISSING and self.backend is not None:
+            stored = self.backend.get(key)
+            if stored is not MISSING:
+                value, expires = stored
+                self._set_local(key, value, expires)
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        self._set_local(key, value, expires)
+        if self.backend is not None:
+            self.backend.set(key, value, expires)
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key, or compute() run once no matter how many callers ask at the same time."""
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                # The previous owner may have stored the value and finished since the lookup above
+                value = self._lookup(key)
+                if value is MISSING and self.backend is not None:
+                    stored = self.backend.get(key)
+                    if stored is not MISSING:
+                        value, expires = stored
+                        self._store(key, value, expires)
+                if value is not MISSING:
+                    return value
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,277 @@
+"""Sarvam text-to-speech for HealthDecoder.
+
+Text is cut into segments (at "|" for Hindi, "." otherwise, and at most 500
+characters), and every segment is synthesised concurrently on a shared pool.
+How many requests are in flight at once is decided by an AIMD limiter shared
+by the whole process: it halves on 429/5xx responses (waiting out any
+Retry-After) and grows again one step at a time while requests succeed.
+SpeechPipeline submits each sentence as soon as it is complete, even while
+the answer is still being generated, and hands clips back in order as they
+are ready, so playback starts with the first sentence. The clips are joined
+with the wave module into a single WAV with one header.
+
+Synthesised segments are kept in a size-bounded DiskLRU keyed by the
+normalised segment text, language, speaker, pace and sample rate, so
+greetings, refusals and advice the assistant repeats are spoken without an
+API call, even when they are only part of a new answer.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import re
+import textwrap
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from utils import registry
+from utils.config import cache_path, env_float, env_int
+from utils.disk_cache import DiskLRU
+
+SARVAM_TTS_URL = os.getenv("SARVAM_TTS_URL", "https://api.sarvam.ai/text-to-speech")
+SPEAKER = os.getenv("SARVAM_SPEAKER", "meera")
+SAMPLE_RATE = env_int("SARVAM_SAMPLE_RATE", 8000)
+PACE = env_float("SARVAM_PACE", 1.0)
+MAX_CHARS = 500
+MAX_ATTEMPTS = 4
+
+_executor = ThreadPoolExecutor(max_workers=env_int("TTS_WORKERS", 8), thread_name_prefix="tts")
+
+
+class TTSError(Exception):
+    pass
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves when the API pushes back and creeps back up while it doesn't."""
+
+    def __init__(self, max_limit=4, increase_after=3):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.increase_after = increase_after
+        self.inflight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self.inflight < self.limit:
+                    self.inflight += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, throttled=False, retry_after=None):
+        with self._cond:
+            self.inflight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                self._paused_until = max(self._paused_until, time.monotonic() + (retry_after or 1.0))
+            else:
+                self._successes += 1
+                if self._successes >= self.increase_after and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+def _get_cache():
+    return registry.get_shared("tts_cache", lambda: DiskLRU(cache_path("tts_segments.sqlite3"),
+                                                            max_bytes=env_int("TTS_CACHE_MB", 100) * 1024 * 1024))
+
+
+_counter_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0}
+
+
+def _count(outcome):
+    with _counter_lock:
+        _counters[outcome] += 1
+
+
+def cache_stats():
+    with _counter_lock:
+        stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def segment_key(text, language_code, speaker, pace, sample_rate):
+    """Cache key of a segment: same words, voice and format give the same audio."""
+    normalised = re.sub(r"\s+", " ", text).strip().lower()
+    raw = f"{normalised}|{language_code}|{speaker}|{pace:g}|{sample_rate}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get_limiter():
+    return registry.get_shared("tts_limiter", lambda: AdaptiveLimiter(max_limit=env_int("TTS_CONCURRENCY", 4)))
+
+
+def _retry_after(response, attempt):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return 0.5 * 2 ** attempt
+
+
+def split_text(text, language_code):
+    """Segments of at most MAX_CHARS characters, split the way the assistant's answers are punctuated."""
+    delimiter = "|" if language_code == "hi-IN" else "."
+    chunks = []
+    for segment in text.split(delimiter):
+        segment = segment.strip()
+        if segment:
+            chunks.extend(textwrap.wrap(segment, MAX_CHARS) if len(segment) > MAX_CHARS else [segment])
+    return chunks
+
+
+def synthesise(text, language_code, speaker=SPEAKER, pace=PACE, sample_rate=SAMPLE_RATE):
+    """WAV bytes for one segment, from the cache or the API (retried with backoff when busy or failing).
+
+    Every failure, including a malformed response, is raised as TTSError.
+    """
+    key = segment_key(text, language_code, speaker, pace, sample_rate)
+    cache = _get_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        _count("hits")
+        return cached
+    _count("misses")
+
+    payload = {
+        "inputs": [text],
+        "target_language_code": language_code,
+        "speaker": speaker,
+        "pitch": 0,
+        "pace": pace,
+        "loudness": 1.15,
+        "speech_sample_rate": sample_rate,
+        "enable_preprocessing": True,
+        "model": "bulbul:v1",
+    }
+    headers = {"API-Subscription-Key": os.getenv("SARVAM_API_KEY", "")}
+    client = registry.get_http_client()
+    limiter = _get_limiter()
+
+    error = None
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        throttled, retry_after = False, None
+        try:
+            response = client.post(SARVAM_TTS_URL, json=payload, headers=headers)
+            if response.status_code == 429 or response.status_code >= 500:
+                throttled, retry_after = True, _retry_after(response, attempt)
+                error = TTSError(f"TTS request failed: {response.status_code}")
+                continue
+            if response.status_code != 200:
+                raise TTSError(f"TTS request failed: {response.status_code}. Reason: {response.text}")
+            try:
+                audio = base64.b64decode(response.json()["audios"][0], validate=True)
+            except (ValueError, KeyError, IndexError, TypeError) as e:    # bad JSON, base64 or shape
+                raise TTSError(f"TTS response malformed: {e!r}") from e
+            cache.set(key, audio)
+            return audio
+        except httpx.TransportError as e:
+            throttled, retry_after = True, 0.5 * 2 ** attempt
+            error = TTSError(f"TTS request failed: {e}")
+        except httpx.HTTPError as e:
+            raise TTSError(f"TTS request failed: {e}") from e
+        finally:
+            limiter.release(throttled, retry_after)
+    raise error
+
+
+class SpeechPipeline:
+    """Speaks text as it arrives: each sentence goes to TTS as soon as it is complete.
+
+    feed() takes text in pieces of any size (e.g. LLM tokens); close() submits
+    whatever is left. next_clip() hands back clips in order, paced so that a
+    clip is only returned once the previous one has had time to play. A
+    segment whose synthesis fails is skipped and its error kept in errors.
+    """
+
+    def __init__(self, language_code):
+        self.language_code = language_code
+        self.delimiter = "|" if language_code == "hi-IN" else "."
+        self.clips = []
+        self.errors = []
+        self.first_clip_at = None
+        self._buffer = ""
+        self._futures = deque()
+        self._playing_until = 0.0
+
+    def _submit(self, sentence):
+        for chunk in split_text(sentence, self.language_code):
+            self._futures.append(_executor.submit(synthesise, chunk, self.language_code))
+
+    def feed(self, text):
+        self._buffer += text
+        if self.delimiter in self._buffer:
+            *sentences, self._buffer = self._buffer.split(self.delimiter)
+            for sentence in sentences:
+                self._submit(sentence)
+
+    def close(self):
+        self._submit(self._buffer)
+        self._buffer = ""
+
+    @property
+    def pending(self):
+        return len(self._futures)
+
+    def next_clip(self, block=False):
+        """Next clip to play, or None if it isn't ready (or the previous one is still playing) and block is False."""
+        while self._futures:
+            if not block and (not self._futures[0].done() or time.monotonic() < self._playing_until):
+                return None
+            try:
+                clip = self._futures.popleft().result()
+                duration = clip_duration(clip)
+            except Exception as e:    # TTSError, or anything unexpected: never abort the answer for audio
+                self.errors.append(e)
+                continue
+            if block:
+                self.wait_played()
+            self._playing_until = time.monotonic() + duration
+            if self.first_clip_at is None:
+                self.first_clip_at = time.perf_counter()
+            self.clips.append(clip)
+            return clip
+        return None
+
+    def wait_played(self):
+        time.sleep(max(0.0, self._playing_until - time.monotonic()))
+
+
+def clip_duration(wav_bytes):
+    with wave.open(io.BytesIO(wav_bytes)) as clip:
+        return clip.getnframes() / clip.getframerate()
+
+
+def concatenate_wavs(clips):
+    """One WAV file holding the PCM frames of every clip in order (clips must share a format)."""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as joined:
+        params = None
+        for wav_bytes in clips:
+            with wave.open(io.BytesIO(wav_bytes)) as clip:
+                clip_params = (clip.getnchannels(), clip.getsampwidth(), clip.getframerate())
+                if params is None:
+                    params = clip_params
+                    joined.setnchannels(params[0])
+                    joined.setsampwidth(params[1])
+                    joined.setframerate(params[2])
+                elif clip_params != params:
+                    raise TTSError(f"Cannot join clips with different formats: {clip_params} != {params}")
+                joined.writeframes(clip.readframes(clip.getnframes()))
+    return output.getvalue()